@@ -0,0 +1,127 @@
+import asyncio
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from .models import Post, Category, Tag
+from .forms import CommentForm
+from .search import search_posts
+from .caching import cache_anonymous_page, async_condition, post_group, post_list_condition, post_detail_condition
+from .concurrency import run_sync
+from .context_processors import SIDEBAR_CACHE_KEY, get_sidebar_categories, get_no_category_post_count
+from . import views
+from do_it_django_prj.db_router import replica_reads
+
+# ASGI(do_it_django_prj/asgi.py)로 실행할 때 사용하는 읽기 전용 페이지의 async 버전.
+# 서로 관계없는 쿼리(포스트 목록, 사이드바의 카테고리 목록, 미분류 포스트 개수 등)를 동시에 실행하고,
+# 템플릿도 스레드에서 렌더링해서 이벤트 루프를 막지 않음.
+# WSGI에서는 blog/views.py의 sync 뷰를 그대로 사용 (blog/urls.py, settings.BLOG_ASYNC_VIEWS)
+
+
+async def get_sidebar():
+    sidebar = await run_sync(cache.get)(SIDEBAR_CACHE_KEY)
+    if sidebar is None:
+        categories, no_category_post_count = await asyncio.gather(
+            run_sync(get_sidebar_categories)(),
+            run_sync(get_no_category_post_count)(),
+        )
+        sidebar = {'categories': categories, 'no_category_post_count': no_category_post_count}
+        await run_sync(cache.set)(SIDEBAR_CACHE_KEY, sidebar, settings.BLOG_SIDEBAR_CACHE_TIMEOUT)
+    return sidebar
+
+
+async def render(request, template_name, context):
+    response = TemplateResponse(request, template_name, context)
+    await run_sync(response.render)()
+    return response
+
+
+def page_context(request, view_class, get_queryset, **kwargs):
+    # sync 뷰 클래스의 페이지네이션(keyset / 페이지 번호)과 get_context_data()를 그대로 사용해서 한 페이지를 가져옴
+    view = view_class()
+    view.setup(request, **kwargs)
+    view.object_list = get_queryset()
+    context = view.get_context_data()
+    # 태그는 prefetch_related로 가져오므로 페이지를 이 스레드에서 미리 평가.
+    # 페이지를 나누지 않으면 전체를 읽음 (스트리밍(blog/streaming.py)은 DB를 읽으면서 보내야 하므로 sync 뷰에서만 사용)
+    context['object_list'] = context['post_list'] = list(context['post_list'])
+    return context
+
+
+async def post_list_page(request, view_class, get_queryset, *objects, **kwargs):
+    # 포스트 한 페이지, 사이드바, 그 밖의 객체(카테고리, 태그 등)를 동시에 가져옴
+    context, sidebar, *objects = await asyncio.gather(
+        run_sync(page_context)(request, view_class, get_queryset, **kwargs),
+        get_sidebar(),
+        *objects,
+    )
+    context.update(sidebar)
+    return context, objects
+
+
+@replica_reads
+@async_condition(post_list_condition)
+@cache_anonymous_page()
+async def post_list(request):
+    context, _ = await post_list_page(request, views.PostList, lambda: Post.objects.with_relations().order_by('-pk'))
+    return await render(request, 'blog/post_list.html', context)
+
+
+@replica_reads
+@async_condition(post_list_condition)
+@cache_anonymous_page()
+async def post_search(request, q):
+    # 검색 색인 조회도 페이지를 가져오는 스레드에서 함께 실행. search_info는 PostSearch.get_context_data()가 만듦
+    context, _ = await post_list_page(request, views.PostSearch, lambda: search_posts(q).with_relations(), q=q)
+    return await render(request, 'blog/post_list.html', context)
+
+
+@replica_reads
+@async_condition(post_list_condition)
+@cache_anonymous_page()
+async def category_page(request, slug):
+    if slug == 'no_category':
+        context, _ = await post_list_page(
+            request, views.PostList, lambda: Post.objects.filter(category=None).with_relations().order_by('-pk'),
+        )
+        context['category'] = '미분류'
+    else:
+        # 카테고리를 찾는 쿼리와 포스트 목록 쿼리를 동시에 실행 (포스트는 카테고리 slug로 찾음)
+        context, (category,) = await post_list_page(
+            request, views.PostList, lambda: Post.objects.filter(category__slug=slug).with_relations().order_by('-pk'),
+            run_sync(get_object_or_404)(Category, slug=slug),
+        )
+        context['category'] = category
+    return await render(request, 'blog/post_list.html', context)
+
+
+@replica_reads
+@async_condition(post_list_condition)
+@cache_anonymous_page()
+async def tag_page(request, slug):
+    context, (tag,) = await post_list_page(
+        request, views.PostList, lambda: Post.objects.filter(tags__slug=slug).with_relations().order_by('-pk'),
+        run_sync(get_object_or_404)(Tag, slug=slug),
+    )
+    context['tag'] = tag
+    return await render(request, 'blog/post_list.html', context)
+
+
+@replica_reads
+@async_condition(post_detail_condition)
+@cache_anonymous_page(lambda pk: [post_group(pk)])
+async def post_detail(request, pk):
+    # 포스트, 댓글, 사이드바를 동시에 가져옴
+    post, comments, sidebar = await asyncio.gather(
+        run_sync(get_object_or_404)(Post.objects.with_relations(), pk=pk),
+        run_sync(views.get_comment_page)(pk),
+        get_sidebar(),
+    )
+    context = {
+        'object': post,
+        'post': post,
+        'comment_form': CommentForm,
+        'comments': comments,
+        **sidebar,
+    }
+    return await render(request, 'blog/post_detail.html', context)
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from allauth.socialaccount.models import SocialAccount
+
+AVATAR_CACHE_KEY = 'blog:avatar:{}'
+DEFAULT_AVATAR_URL = 'https://doitdjango.com/avatar/id/1369/720e6b0110aee476/svg/{}'
+
+
+def get_avatar_url(user):
+    url = cache.get(AVATAR_CACHE_KEY.format(user.pk))
+    if url is None:
+        url = prime_avatar_urls([user])[user.pk]
+    return url
+
+
+def prime_avatar_urls(users):
+    # 한 페이지에 나오는 작성자들의 소셜 계정을 한 번의 쿼리로 가져와서 사용자별 아바타 주소를 캐시에 저장.
+    users = {user.pk: user for user in users if user is not None}
+    keys = {pk: AVATAR_CACHE_KEY.format(pk) for pk in users}
+    cached = cache.get_many(keys.values())
+    urls = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in users if pk not in urls]
+    if missing:
+        accounts = {}
+        # socialaccount_set.first() 와 같도록 사용자별로 pk가 가장 작은 계정을 사용.
+        for account in SocialAccount.objects.filter(user_id__in=missing).order_by('pk'):
+            accounts.setdefault(account.user_id, account)
+
+        new_urls = {}
+        for pk in missing:
+            account = accounts.get(pk)
+            url = account.get_avatar_url() if account else None
+            new_urls[pk] = url or DEFAULT_AVATAR_URL.format(users[pk].email)
+        cache.set_many({keys[pk]: url for pk, url in new_urls.items()}, None)
+        urls.update(new_urls)
+
+    return urls
+
+
+def invalidate_avatar_url(user_id):
+    cache.delete(AVATAR_CACHE_KEY.format(user_id))
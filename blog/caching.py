@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+from .concurrency import run_sync
+from do_it_django_prj.db_router import reading_from_replica
+
+GENERATION_CACHE_KEY = 'blog:generation:{}'
+PAGE_CACHE_KEY = 'blog:page:{}:{}'
+
+# 'blog' : 포스트, 태그, 카테고리가 바뀌면 올라감 -> 모든 페이지(사이드바 포함)가 새로 만들어짐
+# 'post:<pk>' : 해당 포스트의 댓글이 바뀌면 올라감 -> 그 포스트의 상세 페이지만 새로 만들어짐
+BLOG_GROUP = 'blog'
+
+
+def post_group(pk):
+    return f'post:{pk}'
+
+
+def get_generations(groups):
+    keys = [GENERATION_CACHE_KEY.format(group) for group in groups]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # 캐시에서 지워졌다가 다시 만들어져도 예전 값과 겹치지 않도록 현재 시각으로 시작.
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate_group(group):
+    key = GENERATION_CACHE_KEY.format(group)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def page_cache_key(request, groups):
+    generations = '.'.join(str(generation) for generation in get_generations(groups))
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_CACHE_KEY.format(generations, path)
+
+
+def cache_anonymous_page(get_groups=None):
+    # 로그인하지 않은 사용자의 GET 요청만 페이지 전체를 캐시함.
+    # 로그인한 사용자에게는 수정 버튼, 댓글 입력창 등이 보이므로 캐시하지 않음.
+    # async 뷰(blog/async_views.py)에도 사용할 수 있음.
+    def lookup(request, kwargs):
+        # 캐시하지 않는 요청이면 (None, None), 아니면 (캐시 키, 캐시된 값 또는 None)
+        timeout = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 0)
+        if not timeout or request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return None, None
+        groups = [BLOG_GROUP] + (get_groups(**kwargs) if get_groups else [])
+        key = page_cache_key(request, groups)
+        return key, cache.get(key)
+
+    def store(key, response):
+        if response.status_code == 200 and not response.streaming:
+            timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+            if reading_from_replica():
+                # 복제 DB는 primary보다 조금 늦을 수 있으므로, 방금 바뀐 내용이 빠진 페이지가
+                # 새 generation으로 오래 남지 않게 복제 지연만큼만 캐시 (do_it_django_prj/db_router.py)
+                timeout = min(timeout, settings.DATABASE_REPLICA_PIN_SECONDS)
+            cache.set(key, (response.content, response['Content-Type']), timeout)
+
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                key, cached = await run_sync(lookup)(request, kwargs)
+                if key is None:
+                    return await view_func(request, *args, **kwargs)
+                if cached is not None:
+                    content, content_type = cached
+                    return HttpResponse(content, content_type=content_type)
+
+                response = await view_func(request, *args, **kwargs)
+                await run_sync(store)(key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key, cached = lookup(request, kwargs)
+            if key is None:
+                return view_func(request, *args, **kwargs)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+
+            if hasattr(response, 'add_post_render_callback') and not response.is_rendered:
+                response.add_post_render_callback(lambda response: store(key, response))
+            else:
+                store(key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+# 조건부 GET(ETag/Last-Modified)
+# 브라우저나 nginx가 가진 페이지가 최신이면 템플릿, 마크다운을 거치지 않고 304를 돌려줌.
+
+def _aware(value):
+    # USE_TZ = False 이므로 DB의 시각은 TIME_ZONE 기준 naive datetime.
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value, timezone.get_default_timezone())
+    return value
+
+
+def _etag(request, *parts):
+    # 로그인한 사용자마다(수정 버튼, csrf 토큰이 다름) 다른 ETag를 사용.
+    parts = parts + (
+        request.user.pk or 0,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    )
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _post_detail_state(request, pk):
+    if not hasattr(request, '_blog_condition'):
+        from .models import Post
+
+        request._blog_condition = Post.objects.filter(pk=pk).annotate(
+            last_comment_at=Max('comment__modified_at'),
+        ).values_list('updated_at', 'last_comment_at', 'comment_count').first()
+    return request._blog_condition
+
+
+def post_detail_etag(request, pk, **kwargs):
+    state = _post_detail_state(request, pk)
+    if state is None:
+        return None
+    from .context_processors import get_sidebar
+    return _etag(request, 'post', pk, *state, _sidebar_state(get_sidebar()), *get_generations([BLOG_GROUP]))
+
+
+def post_detail_last_modified(request, pk, **kwargs):
+    state = _post_detail_state(request, pk)
+    if state is None:
+        return None
+    updated_at, last_comment_at, _ = state
+    return _aware(max(updated_at, last_comment_at or updated_at))
+
+
+def _post_list_state(request):
+    if not hasattr(request, '_blog_condition'):
+        from .models import Post
+
+        # 가장 최근 수정 시각은 updated_at 색인의 끝 값만 읽음. 포스트 삭제처럼 이 값이 바뀌지 않는 변경은
+        # ETag에 들어가는 'blog' generation(blog/signals.py)으로 반영됨.
+        request._blog_condition = Post.objects.aggregate(last_updated_at=Max('updated_at'))['last_updated_at']
+    return request._blog_condition
+
+
+def _sidebar_state(sidebar):
+    return [(c.pk, c.name, c.post_count) for c in sidebar['categories']] + [sidebar['no_category_post_count']]
+
+
+def post_list_etag(request, *args, **kwargs):
+    # 태그 이름 변경/삭제처럼 포스트의 updated_at이 바뀌지 않는 변경도 반영되도록
+    # 페이지 캐시와 같은 'blog' generation을 ETag에 포함
+    from .context_processors import get_sidebar
+    return _etag(
+        request, 'list', request.get_full_path(), _post_list_state(request), _sidebar_state(get_sidebar()),
+        *get_generations([BLOG_GROUP]),
+    )
+
+
+def post_list_last_modified(request, *args, **kwargs):
+    return _aware(_post_list_state(request))
+
+
+post_detail_condition = condition(etag_func=post_detail_etag, last_modified_func=post_detail_last_modified)
+post_list_condition = condition(etag_func=post_list_etag, last_modified_func=post_list_last_modified)
+
+
+class _Proceed(HttpResponse):
+    pass
+
+
+def async_condition(sync_condition):
+    # django.views.decorators.http.condition은 sync 뷰에만 쓸 수 있으므로, 위의 조건(post_list_condition 등)을
+    # 빈 sync 뷰에 적용해서 스레드에서 검사하고, 304/412가 아니면 async 뷰를 실행한 뒤 ETag/Last-Modified를 붙임.
+    def decorator(view_func):
+        @sync_condition
+        def check(request, *args, **kwargs):
+            return _Proceed()
+
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            checked = await run_sync(check)(request, *args, **kwargs)
+            if not isinstance(checked, _Proceed):
+                return checked
+            response = await view_func(request, *args, **kwargs)
+            for header in ('ETag', 'Last-Modified'):
+                if checked.has_header(header) and not response.has_header(header):
+                    response[header] = checked[header]
+            return response
+        return wrapper
+    return decorator
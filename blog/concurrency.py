@@ -0,0 +1,20 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+
+def run_sync(func):
+    # async 뷰에서 ORM, 캐시처럼 동기 코드를 실행할 때 사용. 이벤트 루프를 막지 않도록 스레드에서 실행함.
+    if connection.vendor == 'sqlite':
+        # SQLite는 쓰기를 한 번에 하나만 할 수 있고, 테스트에서는 트랜잭션 안의 데이터가
+        # 같은 연결에서만 보이므로 Django의 기본 스레드 하나에서 차례로 실행.
+        return sync_to_async(func, thread_sensitive=True)
+
+    def in_thread(*args, **kwargs):
+        # 여러 스레드에서 동시에 실행해서 독립적인 쿼리를 함께 기다림. 스레드마다 DB 연결이 따로 생기므로
+        # 요청이 끝날 때처럼 CONN_MAX_AGE가 지난 연결은 닫음.
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(in_thread, thread_sensitive=False)
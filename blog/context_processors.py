@@ -0,0 +1,57 @@
+import os
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from .models import Post, Category
+
+SIDEBAR_CACHE_KEY = 'blog:sidebar'
+# settings.BLOG_VENDOR_DIR 안의 경로
+VENDOR_FILES = ('vendor.bundle.js', 'fontawesome/css/all.min.css')
+
+
+def get_sidebar_categories():
+    # 카테고리별 포스트 수는 Category.post_count 컬럼에 저장되어 있음.
+    return list(Category.objects.all())
+
+
+def get_no_category_post_count():
+    return Post.objects.filter(category=None).count()
+
+
+def get_sidebar():
+    # 사이드바는 모든 방문자에게 똑같으므로 캐시에 저장해두고,
+    # Post나 Category가 저장/삭제되어 커밋될 때 캐시를 지움(blog/signals.py).
+    # async 뷰에서는 blog/async_views.py의 get_sidebar()가 두 쿼리를 동시에 실행함.
+    sidebar = cache.get(SIDEBAR_CACHE_KEY)
+    if sidebar is None:
+        sidebar = {
+            'categories': get_sidebar_categories(),
+            'no_category_post_count': get_no_category_post_count(),
+        }
+        cache.set(SIDEBAR_CACHE_KEY, sidebar, settings.BLOG_SIDEBAR_CACHE_TIMEOUT)
+    return sidebar
+
+
+def invalidate_sidebar():
+    cache.delete(SIDEBAR_CACHE_KEY)
+
+
+def sidebar(request):
+    # 템플릿에서 실제로 사용할 때만 캐시를 조회하도록 지연 객체로 넘김.
+    lazy_sidebar = SimpleLazyObject(get_sidebar)
+    return {
+        'categories': SimpleLazyObject(lambda: lazy_sidebar['categories']),
+        'no_category_post_count': SimpleLazyObject(lambda: lazy_sidebar['no_category_post_count']),
+    }
+
+
+@lru_cache()
+def vendor_files_exist(vendor_dir):
+    return all(os.path.exists(os.path.join(vendor_dir, *path.split('/'))) for path in VENDOR_FILES)
+
+
+def vendor_assets(request):
+    # True면 CDN 대신 vendor_static_assets 명령으로 받아둔 jQuery, Popper, Bootstrap JS, Font Awesome을 사용
+    # (blog/vendor_css.html, blog/vendor_js.html). 파일을 받아두지 않았으면 CDN을 그대로 사용.
+    return {'vendor_assets': settings.BLOG_VENDOR_ASSETS and vendor_files_exist(settings.BLOG_VENDOR_DIR)}
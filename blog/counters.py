@@ -0,0 +1,31 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Post, Category, Tag, Comment
+
+
+def _count(queryset, field):
+    # OuterRef('pk') 별로 개수를 세는 서브쿼리. 해당하는 행이 없으면 0.
+    counts = queryset.order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def refresh_category_counts(category_ids=None):
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in=[pk for pk in category_ids if pk is not None])
+    categories.update(post_count=_count(Post.objects.filter(category=OuterRef('pk')), 'category'))
+
+
+def refresh_tag_counts(tag_ids=None):
+    tags = Tag.objects.all()
+    if tag_ids is not None:
+        tags = tags.filter(pk__in=tag_ids)
+    tags.update(post_count=_count(Post.tags.through.objects.filter(tag=OuterRef('pk')), 'tag'))
+
+
+def refresh_comment_counts(post_ids=None):
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    # update()는 save()를 거치지 않으므로 updated_at이 바뀌지 않음.
+    posts.update(comment_count=_count(Comment.objects.filter(post=OuterRef('pk')), 'post'))
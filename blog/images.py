@@ -0,0 +1,100 @@
+import logging
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Post.head_image를 목록 카드, 상세 페이지 크기로 줄이고 다시 압축한 파일(JPEG, WebP)을 원본 옆에 만듦.
+# 만든 파일 목록은 Post.head_image_variants에 저장하고, 템플릿에서는 Post.get_head_image_sources()로 srcset을 만듦.
+
+logger = logging.getLogger(__name__)
+
+# 용도별로 만들 가로 크기(px). 원본보다 큰 크기는 만들지 않음.
+# card : 목록 페이지 카드(가장 넓을 때 약 730px), detail : 상세 페이지 본문 폭(약 850px). 고해상도 화면용 2배 크기 포함.
+VARIANT_WIDTHS = {
+    'card': (400, 800, 1600),
+    'detail': (900, 1800),
+}
+
+FORMATS = {
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+}
+
+
+def variant_name(name, kind, width, extension):
+    # blog/images/2022/12/01/photo.jpg -> blog/images/2022/12/01/photo.card-800.webp
+    root, _ = os.path.splitext(name)
+    return f'{root}.{kind}-{width}.{extension}'
+
+
+def to_rgb(image):
+    # JPEG에는 투명도가 없으므로 투명한 부분은 흰 배경으로 채움
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(name, storage=default_storage):
+    # 원본 이미지 하나에서 모든 크기/형식을 만들고 Post.head_image_variants에 저장할 dict를 돌려줌.
+    # 관리 명령(generate_image_variants)이 여러 프로세스에서 실행하므로 DB는 사용하지 않음.
+    with storage.open(name) as f:
+        image = Image.open(f)
+        image.load()
+    # 휴대폰 사진은 EXIF의 회전 정보대로 돌려야 제대로 보임
+    image = to_rgb(ImageOps.exif_transpose(image))
+
+    variants = {'source': name, 'width': image.width, 'height': image.height}
+    for kind, widths in VARIANT_WIDTHS.items():
+        variants[kind] = {format_name: [] for format_name in FORMATS}
+        # 원본이 가장 작은 크기보다 작아도 재압축한 파일은 하나 만듦
+        targets = sorted({min(width, image.width) for width in widths})
+        for width in targets:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for format_name, (extension, options) in FORMATS.items():
+                buffer = BytesIO()
+                resized.save(buffer, format_name.upper(), **options)
+                path = variant_name(name, kind, width, extension)
+                if storage.exists(path):
+                    storage.delete(path)
+                storage.save(path, ContentFile(buffer.getvalue()))
+                variants[kind][format_name].append([width, path])
+    return variants
+
+
+def safe_generate_variants(name, storage=default_storage):
+    # 이미지가 아니거나 깨진 파일이면 변환하지 않고 원본을 그대로 사용
+    try:
+        return generate_variants(name, storage)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning('could not generate image variants for %s: %s', name, e)
+        return {'source': name}
+
+
+def delete_variants(variants, storage=default_storage):
+    for kind in VARIANT_WIDTHS:
+        for files in variants.get(kind, {}).values():
+            for _, path in files:
+                storage.delete(path)
+
+
+def get_sources(variants, kind, storage=default_storage):
+    files = variants.get(kind)
+    if not files:
+        return None
+    jpeg, webp = files['jpeg'], files['webp']
+    # srcset을 지원하지 않는 브라우저에서는 두 번째로 작은 크기(보통 1배 화면에 맞는 크기)를 사용
+    width, path = jpeg[min(1, len(jpeg) - 1)]
+    return {
+        'src': storage.url(path),
+        # 이미지를 받기 전에 자리를 잡아둘 수 있도록 크기도 넘김
+        'width': width,
+        'height': round(variants['height'] * width / variants['width']),
+        'srcset': ', '.join(f'{storage.url(path)} {width}w' for width, path in jpeg),
+        'webp_srcset': ', '.join(f'{storage.url(path)} {width}w' for width, path in webp),
+    }
@@ -0,0 +1,76 @@
+import json
+import statistics
+import time
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+from .benchmark_views import NO_CACHE, percentile
+
+
+class Command(BaseCommand):
+    help = ('CONN_MAX_AGE=0(요청마다 새로 연결)과 연결 재사용(settings의 CONN_MAX_AGE)일 때 '
+            '같은 페이지의 응답 시간과 새로 연 연결 수를 비교합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--json', metavar='PATH', help='결과를 JSON 파일로 저장')
+
+    def handle(self, *args, **options):
+        if connection.in_atomic_block:
+            raise CommandError('트랜잭션 안에서는 연결을 닫을 수 없어서 측정할 수 없습니다.')
+
+        max_age = connection.settings_dict['CONN_MAX_AGE'] or 60
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver'], CACHES=NO_CACHE, BLOG_PAGE_CACHE_TIMEOUT=0):
+            for name, conn_max_age in (('new connection per request', 0), (f'persistent ({max_age}s)', max_age)):
+                results[name] = self.measure(options['url'], options['iterations'], conn_max_age)
+                self.stdout.write(
+                    f"{name:<28} p50 {results[name]['p50_ms']:>7.2f}ms  p90 {results[name]['p90_ms']:>7.2f}ms  "
+                    f"mean {results[name]['mean_ms']:>7.2f}ms  connections {results[name]['connections']}"
+                )
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'database': connection.vendor, 'url': options['url'], 'results': results},
+                          f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'saved to {options["json"]}'))
+
+    def measure(self, url, iterations, conn_max_age):
+        original = connection.settings_dict['CONN_MAX_AGE']
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.close()
+
+        opened = []
+
+        def count_connection(**kwargs):
+            opened.append(1)
+
+        connection_created.connect(count_connection)
+        client = Client()
+        latencies = []
+        try:
+            for _ in range(iterations):
+                # 테스트 클라이언트는 요청 시작/끝에서 연결을 닫지 않으므로 실제 서버처럼 신호를 직접 보냄
+                started = time.perf_counter()
+                request_started.send(sender=WSGIHandler)
+                response = client.get(url)
+                request_finished.send(sender=WSGIHandler)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} : {response.status_code}')
+        finally:
+            connection_created.disconnect(count_connection)
+            connection.settings_dict['CONN_MAX_AGE'] = original
+            connection.close()
+
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p90_ms': round(percentile(latencies, 90), 2),
+            'mean_ms': round(statistics.mean(latencies), 2),
+            'connections': len(opened),
+        }
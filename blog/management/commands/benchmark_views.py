@@ -0,0 +1,131 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from blog.models import Post, Category, Tag
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = ('블로그 페이지(PostList, PostDetail, PostSearch, 카테고리, 태그, landing)를 테스트 클라이언트로 요청해서 '
+            '응답 시간 백분위, 쿼리 수, 최대 메모리 사용량을 측정합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--with-cache', action='store_true',
+                            help='캐시를 켠 상태로 측정(기본은 캐시를 끄고 실제로 하는 일을 측정)')
+        parser.add_argument('--json', metavar='PATH', help='결과를 JSON 파일로 저장')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        views = self.get_views()
+        if not views:
+            raise CommandError('포스트가 없습니다. 먼저 generate_blog_data를 실행하세요.')
+
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if not options['with_cache']:
+            overrides.update(CACHES=NO_CACHE, BLOG_PAGE_CACHE_TIMEOUT=0)
+
+        results = {}
+        with override_settings(**overrides):
+            client = Client()
+            for name, make_url in views.items():
+                results[name] = self.measure(client, make_url, options['iterations'], options['warmup'])
+                self.report(name, results[name])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({
+                    'commit': self.get_commit(),
+                    'database': connection.vendor,
+                    'post_count': Post.objects.count(),
+                    'iterations': options['iterations'],
+                    'with_cache': options['with_cache'],
+                    'views': results,
+                }, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'saved to {options["json"]}'))
+
+    def get_views(self):
+        post_pks = list(Post.objects.order_by('-pk').values_list('pk', flat=True)[:1000])
+        if not post_pks:
+            return {}
+        category_slugs = list(Category.objects.values_list('slug', flat=True)[:100]) or ['no_category']
+        tag_slugs = list(Tag.objects.filter(post_count__gt=0).values_list('slug', flat=True)[:100])
+        words = [word for title in Post.objects.filter(pk__in=post_pks[:50]).values_list('title', flat=True)
+                 for word in title.split()] or ['post']
+
+        views = {
+            'PostList': lambda: '/blog/',
+            'PostList (older page)': lambda: f'/blog/?before={self.random.choice(post_pks)}',
+            'PostDetail': lambda: f'/blog/{self.random.choice(post_pks)}/',
+            'PostSearch': lambda: f'/blog/search/{self.random.choice(words)}/',
+            'category_page': lambda: f'/blog/category/{self.random.choice(category_slugs)}/',
+            'landing': lambda: '/',
+        }
+        if tag_slugs:
+            views['tag_page'] = lambda: f'/blog/tag/{self.random.choice(tag_slugs)}/'
+        return views
+
+    def measure(self, client, make_url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(make_url())
+
+        latencies = []
+        query_counts = []
+        for _ in range(iterations):
+            url = make_url()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url} : {response.status_code}')
+            query_counts.append(len(queries.captured_queries))
+
+        # tracemalloc은 실행 속도를 떨어뜨리므로 메모리는 따로 측정
+        tracemalloc.start()
+        peak = 0
+        for _ in range(min(iterations, 5)):
+            tracemalloc.reset_peak()
+            client.get(make_url())
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p90_ms': round(percentile(latencies, 90), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(statistics.mean(latencies), 2),
+            'queries_mean': round(statistics.mean(query_counts), 1),
+            'queries_max': max(query_counts),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<24} p50 {result['p50_ms']:>8.2f}ms  p90 {result['p90_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms  queries {result['queries_mean']:>5.1f}  "
+            f"peak {result['peak_memory_kb']:>8.1f}KB"
+        )
+
+    def get_commit(self):
+        try:
+            return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
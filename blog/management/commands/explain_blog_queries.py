@@ -0,0 +1,94 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from blog.models import Post, Category, Tag
+
+
+class Command(BaseCommand):
+    help = ('블로그 페이지들이 실행하는 쿼리마다 EXPLAIN을 실행해서 '
+            '색인 없이 테이블 전체를 읽는(sequential scan) 쿼리를 보고합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='sequential scan이 있으면 실패(종료 코드 1)')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'{connection.vendor}는 지원하지 않습니다.')
+
+        report = []
+        for url in self.get_urls():
+            for sql, params in self.capture_queries(url):
+                plan = self.explain(sql, params)
+                report.append({
+                    'url': url,
+                    'sql': sql,
+                    'plan': plan,
+                    'scans': [line for line in plan if self.is_sequential_scan(line)],
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            for item in report:
+                marker = self.style.WARNING('SCAN') if item['scans'] else self.style.SUCCESS('OK  ')
+                self.stdout.write(f"{marker} {item['url']}  {item['sql'][:150]}")
+                for line in item['scans']:
+                    self.stdout.write(f'       {line}')
+
+        scans = [item for item in report if item['scans']]
+        self.stdout.write(f'{len(report)} queries explained, {len(scans)} with sequential scans')
+        if scans and options['fail_on_scan']:
+            raise CommandError('sequential scan이 있는 쿼리가 있습니다.')
+
+    def get_urls(self):
+        urls = ['/', '/blog/', '/blog/category/no_category/']
+        post = Post.objects.order_by('-pk').first()
+        if post:
+            urls.append(post.get_absolute_url())
+            urls.append(f'/blog/?before={post.pk}')
+            word = post.title.split()[0] if post.title.split() else ''
+            if word:
+                urls.append(f'/blog/search/{word}/')
+        category = Category.objects.first()
+        if category:
+            urls.append(category.get_absolute_url())
+        tag = Tag.objects.first()
+        if tag:
+            urls.append(tag.get_absolute_url())
+        return urls
+
+    def capture_queries(self, url):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            # 같은 페이지에서 똑같이 반복되는 쿼리는 한 번만 EXPLAIN
+            if sql.lstrip().upper().startswith('SELECT') and (sql, params) not in queries:
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        # 캐시를 끄고 요청해야 페이지가 실제로 실행하는 쿼리를 모두 볼 수 있음.
+        dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=dummy_cache, BLOG_PAGE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['testserver']):
+            with connection.execute_wrapper(capture):
+                Client().get(url)
+        return queries
+
+    def explain(self, sql, params):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        # sqlite : (id, parent, notused, detail), postgresql : (QUERY PLAN,)
+        return [str(row[-1]) for row in rows]
+
+    def is_sequential_scan(self, line):
+        if connection.vendor == 'sqlite':
+            # SQLite는 색인에서 필요한 행만 찾으면 SEARCH, 처음부터 끝까지 읽으면 SCAN.
+            # 'SCAN <table> USING (COVERING) INDEX'도 색인 순서로 전체를 읽는 것이므로 scan으로 봄.
+            # 가상 테이블(검색 색인, FTS5)은 MATCH를 모듈 안에서 처리해도 항상 SCAN으로 나오므로 제외.
+            return line.startswith('SCAN ') and 'VIRTUAL TABLE' not in line
+        return 'Seq Scan' in line
@@ -0,0 +1,105 @@
+import gzip
+import json
+import sys
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from blog.models import Post, Category, Tag, Comment
+
+# 한 줄에 하나씩: category, tag, user, post, comment 순서 (import_blog가 이 순서를 가정함)
+POST_FIELDS = ['id', 'title', 'hook_text', 'content', 'head_image', 'file_upload', 'created_at', 'updated_at']
+COMMENT_FIELDS = ['id', 'post_id', 'content', 'created_at', 'modified_at']
+
+
+def open_jsonl(path, mode):
+    # '-'는 표준 입출력, .gz로 끝나면 gzip 압축
+    if path == '-':
+        return sys.stdout if mode == 'w' else sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = ('카테고리, 태그, 사용자, 포스트(태그, 첨부 파일 경로 포함), 댓글을 JSON Lines로 내보냅니다. '
+            '한 번에 batch-size개씩 읽으므로 데이터가 많아도 메모리를 적게 씁니다. '
+            '첨부 파일(_media) 자체는 따로 복사해야 합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="저장할 파일 (.gz로 끝나면 압축, '-'는 표준 출력)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+        counts = {}
+        out = open_jsonl(options['output'], 'w')
+        try:
+            for kind, records in (
+                ('category', self.categories()),
+                ('tag', self.tags()),
+                ('user', self.users()),
+                ('post', self.posts()),
+                ('comment', self.comments()),
+            ):
+                counts[kind] = 0
+                for record in records:
+                    out.write(json.dumps(dict(record, type=kind), cls=DjangoJSONEncoder, ensure_ascii=False))
+                    out.write('\n')
+                    counts[kind] += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        # 표준 출력으로 내보낼 때 데이터와 섞이지 않도록 결과는 표준 에러로
+        report = self.stderr if options['output'] == '-' else self.stdout
+        report.write(f'{summary} exported in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} records/s)')
+
+    def categories(self):
+        return Category.objects.order_by('pk').values('name', 'slug').iterator(chunk_size=self.batch_size)
+
+    def tags(self):
+        return Tag.objects.order_by('pk').values('name', 'slug').iterator(chunk_size=self.batch_size)
+
+    def users(self):
+        # 포스트나 댓글을 쓴 사용자만. 비밀번호는 내보내지 않음.
+        return User.objects.filter(
+            Q(pk__in=Post.objects.values('author')) | Q(pk__in=Comment.objects.values('author'))
+        ).order_by('pk').values('username', 'email', 'first_name', 'last_name', 'is_staff').iterator(
+            chunk_size=self.batch_size
+        )
+
+    def posts(self):
+        last_pk = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values(*POST_FIELDS, author_username=F('author__username'), category_slug=F('category__slug'))
+                [:self.batch_size]
+            )
+            if not posts:
+                return
+            tags = {}
+            for post_id, slug in Post.tags.through.objects.filter(
+                post_id__in=[post['id'] for post in posts]
+            ).order_by('pk').values_list('post_id', 'tag__slug'):
+                tags.setdefault(post_id, []).append(slug)
+            for post in posts:
+                post['author'] = post.pop('author_username')
+                post['category'] = post.pop('category_slug')
+                post['tags'] = tags.get(post['id'], [])
+                yield post
+            last_pk = posts[-1]['id']
+
+    def comments(self):
+        for comment in Comment.objects.order_by('pk').values(
+            *COMMENT_FIELDS, author_username=F('author__username'),
+        ).iterator(chunk_size=self.batch_size):
+            comment['post'] = comment.pop('post_id')
+            comment['author'] = comment.pop('author_username')
+            yield comment
@@ -0,0 +1,145 @@
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import Truncator
+from markdownx.utils import markdown
+from blog.models import Post, Category, Tag, Comment
+from blog.caching import invalidate_group, BLOG_GROUP
+from blog.context_processors import invalidate_sidebar
+from blog.counters import refresh_category_counts, refresh_tag_counts, refresh_comment_counts
+
+KOREAN_WORDS = [
+    '장고', '파이썬', '웹', '프로그래밍', '데이터베이스', '서버', '개발', '블로그', '포스트', '카테고리',
+    '태그', '댓글', '검색', '성능', '캐시', '쿼리', '색인', '템플릿', '배포', '도커',
+]
+ENGLISH_WORDS = [
+    'django', 'python', 'web', 'programming', 'database', 'server', 'develop', 'blog', 'post', 'category',
+    'tag', 'comment', 'search', 'performance', 'cache', 'query', 'index', 'template', 'deploy', 'docker',
+]
+
+
+class Command(BaseCommand):
+    help = '성능 측정용 가짜 데이터(포스트, 카테고리, 태그, 댓글)를 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--tags-per-post', type=int, default=3)
+        parser.add_argument('--comments-per-post', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        # 문단 단위로 미리 마크다운을 변환해 두고 조합해서 쓰면 포스트마다 변환하지 않아도 됨.
+        self.paragraphs = [self.make_paragraph(korean=i % 2 == 0) for i in range(200)]
+        started = time.perf_counter()
+
+        prefix = f'bench-{int(time.time())}'
+        users = self.create_users(prefix, options['users'])
+        categories = self.create_categories(prefix, options['categories'])
+        tags = self.create_tags(prefix, options['tags'])
+
+        created = 0
+        batch_size = options['batch_size']
+        while created < options['posts']:
+            size = min(batch_size, options['posts'] - created)
+            with transaction.atomic():
+                posts = self.create_posts(size, users, categories)
+                self.add_tags(posts, tags, options['tags_per_post'])
+                self.create_comments(posts, users, options['comments_per_post'])
+            created += size
+            self.stdout.write(f'{created} / {options["posts"]} posts')
+
+        self.stdout.write('refreshing counters and search index...')
+        refresh_category_counts()
+        refresh_tag_counts()
+        refresh_comment_counts()
+        call_command('rebuild_search_index', batch_size=batch_size, stdout=self.stdout)
+        invalidate_sidebar()
+        invalidate_group(BLOG_GROUP)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} posts created in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def make_paragraph(self, korean):
+        words = KOREAN_WORDS if korean else ENGLISH_WORDS
+        kind = self.random.choice(['text', 'text', 'heading', 'list', 'code'])
+        sentence = ' '.join(self.random.choice(words) for _ in range(self.random.randint(8, 30)))
+        if kind == 'heading':
+            source = f'## {sentence[:40]}'
+        elif kind == 'list':
+            source = '\n'.join(f'- {self.random.choice(words)} **{self.random.choice(words)}**' for _ in range(4))
+        elif kind == 'code':
+            source = f'```\nprint("{self.random.choice(words)}")\n```'
+        else:
+            source = sentence + '.'
+        return source, markdown(source)
+
+    def create_users(self, prefix, count):
+        User.objects.bulk_create(
+            [User(username=f'{prefix}-user-{i}', email=f'{prefix}-user-{i}@example.com') for i in range(count)]
+        )
+        return list(User.objects.filter(username__startswith=f'{prefix}-user-'))
+
+    def create_categories(self, prefix, count):
+        Category.objects.bulk_create(
+            [Category(name=f'{prefix} 카테고리 {i}', slug=f'{prefix}-category-{i}') for i in range(count)]
+        )
+        return list(Category.objects.filter(slug__startswith=f'{prefix}-category-'))
+
+    def create_tags(self, prefix, count):
+        Tag.objects.bulk_create(
+            [Tag(name=f'{self.random.choice(KOREAN_WORDS + ENGLISH_WORDS)} {i}', slug=f'{prefix}-tag-{i}')
+             for i in range(count)]
+        )
+        return list(Tag.objects.filter(slug__startswith=f'{prefix}-tag-'))
+
+    def create_posts(self, size, users, categories):
+        last_pk = Post.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        posts = []
+        for _ in range(size):
+            paragraphs = self.random.sample(self.paragraphs, self.random.randint(3, 12))
+            post = Post(
+                title=' '.join(self.random.choice(KOREAN_WORDS + ENGLISH_WORDS) for _ in range(3))[:30],
+                hook_text=' '.join(self.random.choice(KOREAN_WORDS) for _ in range(5)),
+                content='\n\n'.join(source for source, _ in paragraphs),
+                content_html='\n'.join(html for _, html in paragraphs),
+                author=self.random.choice(users) if users else None,
+                # 10% 정도는 미분류
+                category=self.random.choice(categories) if categories and self.random.random() > 0.1 else None,
+            )
+            post.content_excerpt = Truncator(post.content_html).words(Post.EXCERPT_WORDS, html=True, truncate=' …')
+            posts.append(post)
+        # bulk_create는 save()와 시그널을 거치지 않음. 카운터와 검색 색인은 마지막에 한 번에 만듦.
+        Post.objects.bulk_create(posts)
+        return list(Post.objects.filter(pk__gt=last_pk).order_by('pk').only('pk'))
+
+    def add_tags(self, posts, tags, tags_per_post):
+        if not tags:
+            return
+        PostTag = Post.tags.through
+        PostTag.objects.bulk_create([
+            PostTag(post_id=post.pk, tag_id=tag.pk)
+            for post in posts
+            for tag in self.random.sample(tags, min(len(tags), self.random.randint(0, tags_per_post * 2)))
+        ])
+
+    def create_comments(self, posts, users, comments_per_post):
+        if not users:
+            return
+        Comment.objects.bulk_create([
+            Comment(
+                post_id=post.pk,
+                author=self.random.choice(users),
+                content=' '.join(self.random.choice(KOREAN_WORDS + ENGLISH_WORDS) for _ in range(12)),
+            )
+            for post in posts
+            for _ in range(self.random.randint(0, comments_per_post * 2))
+        ])
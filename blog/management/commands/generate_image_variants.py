@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from blog.caching import BLOG_GROUP, invalidate_group
+from blog.images import delete_variants, safe_generate_variants
+from blog.models import Post
+
+
+def init_worker():
+    # spawn 방식(macOS, Windows)으로 만든 프로세스에서는 Django를 다시 설정해야 함
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = ('head_image가 있는 포스트의 줄인 이미지(card, detail / JPEG, WebP)를 여러 프로세스에서 만듭니다. '
+            '기본은 아직 만들지 않은 포스트만 처리합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true', help='이미 만든 포스트도 다시 만듦 (크기 설정을 바꾼 뒤 실행)')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        posts = {
+            post.pk: post
+            for post in Post.objects.exclude(head_image='').only('pk', 'head_image', 'head_image_variants')
+            if options['force'] or post.head_image_variants.get('source') != post.head_image.name
+        }
+        if not posts:
+            self.stdout.write('nothing to do')
+            return
+
+        for post in posts.values():
+            delete_variants(post.head_image_variants)
+
+        # fork한 프로세스가 부모의 DB 연결을 함께 쓰지 않도록 먼저 닫음 (이미지 변환에는 DB를 쓰지 않음)
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close()
+
+        pks = list(posts)
+        names = [posts[pk].head_image.name for pk in pks]
+        batch = []
+        count = 0
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as executor:
+            for pk, variants in zip(pks, executor.map(safe_generate_variants, names, chunksize=4)):
+                post = posts[pk]
+                post.head_image_variants = variants
+                failed += 'card' not in variants
+                batch.append(post)
+                if len(batch) >= options['batch_size']:
+                    count += self.flush(batch)
+                    batch = []
+        if batch:
+            count += self.flush(batch)
+
+        # 캐시된 페이지에 예전 <img>가 남지 않도록
+        invalidate_group(BLOG_GROUP)
+        self.stdout.write(self.style.SUCCESS(f'{count} posts processed ({failed} failed)'))
+
+    def flush(self, batch):
+        # save()를 거치지 않으므로 updated_at은 바뀌지 않음.
+        Post.objects.bulk_update(batch, ['head_image_variants'])
+        return len(batch)
@@ -0,0 +1,218 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import groupby
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from blog.models import Post, Category, Tag, Comment, ImportCheckpoint, ImportedPost
+from blog.caching import invalidate_group, BLOG_GROUP
+from blog.context_processors import invalidate_sidebar
+from blog.counters import refresh_category_counts, refresh_tag_counts, refresh_comment_counts
+from .export_blog import open_jsonl
+
+
+@contextmanager
+def keep_timestamps(model):
+    # auto_now_add/auto_now 필드는 저장할 때 지금 시각으로 바뀌므로, 가져오는 동안에는 꺼서 원래 시각을 그대로 저장
+    fields = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = ('export_blog로 내보낸 JSON Lines 파일을 가져옵니다. batch-size줄씩 bulk_create로 한 트랜잭션에 저장하고, '
+            '같은 트랜잭션에서 진행 상황(ImportCheckpoint)도 기록하므로 중간에 실패해도 다시 실행하면 이어서 가져옵니다. '
+            '끝나면 카운터, 검색 색인, 캐시를 한 번에 갱신합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='export_blog로 만든 파일 (.gz 가능)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--restart', action='store_true', help='checkpoint를 무시하고 처음부터 가져옴')
+
+    def handle(self, *args, **options):
+        if options['input'] == '-':
+            raise CommandError('이어서 가져오려면 위치를 기억해야 하므로 표준 입력은 사용할 수 없습니다.')
+        source = os.path.abspath(options['input'])
+        if options['restart']:
+            ImportCheckpoint.objects.filter(source=source).delete()
+        self.checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+        if self.checkpoint.line:
+            self.stdout.write(f'resuming after line {self.checkpoint.line}')
+        self.counts = {}
+        self.missing_media = 0
+
+        started = time.perf_counter()
+        with open_jsonl(options['input'], 'r') as f:
+            records = self.read(f, self.checkpoint.line)
+            for kind, batch in self.batches(records, options['batch_size']):
+                handler = getattr(self, f'import_{kind}', None)
+                if handler is None:
+                    raise CommandError(f'{batch[0][0]}번째 줄: 알 수 없는 type {kind!r}')
+                line_number = batch[-1][0]
+                # 묶음과 진행 상황을 한 트랜잭션에 저장하므로, 어디서 멈춰도 같은 줄을 두 번 가져오지 않음
+                with transaction.atomic():
+                    handler([record for _, record in batch])
+                    ImportCheckpoint.objects.filter(pk=self.checkpoint.pk).update(line=line_number)
+                self.counts[kind] = self.counts.get(kind, 0) + len(batch)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'line {line_number}: {self.counts[kind]} {kind} '
+                    f'({sum(self.counts.values()) / elapsed:.0f} records/s)'
+                )
+
+        self.stdout.write('refreshing counters and search index...')
+        refresh_category_counts()
+        refresh_tag_counts()
+        refresh_comment_counts()
+        call_command('rebuild_search_index', batch_size=options['batch_size'], stdout=self.stdout)
+        invalidate_sidebar()
+        invalidate_group(BLOG_GROUP)
+        self.checkpoint.delete()
+
+        elapsed = time.perf_counter() - started
+        total = sum(self.counts.values())
+        summary = ', '.join(f'{count} {kind}' for kind, count in self.counts.items()) or 'nothing'
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary} imported in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} records/s)'
+        ))
+        if self.missing_media:
+            self.stdout.write(self.style.WARNING(
+                f'{self.missing_media} media files are missing. Copy the _media folder of the source too. '
+                f'(then run generate_image_variants)'
+            ))
+
+    def read(self, f, skip):
+        for line_number, line in enumerate(f, start=1):
+            if line_number <= skip or not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                raise CommandError(f'{line_number}번째 줄: {e}')
+
+    def batches(self, records, batch_size):
+        # 같은 종류가 이어지는 동안 batch_size개씩 묶음
+        for kind, group in groupby(records, key=lambda item: item[1].get('type')):
+            batch = []
+            for item in group:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    yield kind, batch
+                    batch = []
+            if batch:
+                yield kind, batch
+
+    # 카테고리, 태그, 사용자는 slug/username으로 찾으므로 이미 있으면 그대로 둠
+
+    def import_category(self, records):
+        Category.objects.bulk_create(
+            [Category(name=record['name'], slug=record['slug']) for record in records], ignore_conflicts=True,
+        )
+
+    def import_tag(self, records):
+        Tag.objects.bulk_create(
+            [Tag(name=record['name'], slug=record['slug']) for record in records], ignore_conflicts=True,
+        )
+
+    def import_user(self, records):
+        # 비밀번호는 옮기지 않으므로 로그인하려면 비밀번호 재설정(또는 소셜 로그인)이 필요
+        users = []
+        for record in records:
+            user = User(username=record['username'], email=record.get('email', ''),
+                        first_name=record.get('first_name', ''), last_name=record.get('last_name', ''),
+                        is_staff=record.get('is_staff', False))
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, ignore_conflicts=True)
+
+    def import_post(self, records):
+        users = self.users_by_username(record.get('author') for record in records)
+        categories = dict(Category.objects.filter(
+            slug__in={record['category'] for record in records if record.get('category')}
+        ).values_list('slug', 'pk'))
+
+        posts = []
+        for record in records:
+            post = Post(
+                title=record['title'],
+                hook_text=record.get('hook_text', ''),
+                content=record['content'],
+                head_image=record.get('head_image') or '',
+                file_upload=record.get('file_upload') or '',
+                author_id=users.get(record.get('author')),
+                category_id=categories.get(record.get('category')),
+            )
+            post.created_at = parse_datetime(record['created_at'])
+            post.updated_at = parse_datetime(record['updated_at'])
+            post.render_content()
+            for name in (post.head_image.name, post.file_upload.name):
+                if name and not default_storage.exists(name):
+                    self.missing_media += 1
+            posts.append(post)
+        posts = self.bulk_create(Post, posts)
+        ImportedPost.objects.bulk_create([
+            ImportedPost(checkpoint=self.checkpoint, source_id=record['id'], post_id=post.pk)
+            for post, record in zip(posts, records)
+        ])
+
+        tags = dict(Tag.objects.filter(
+            slug__in={slug for record in records for slug in record.get('tags', [])}
+        ).values_list('slug', 'pk'))
+        PostTag = Post.tags.through
+        PostTag.objects.bulk_create([
+            PostTag(post_id=post.pk, tag_id=tags[slug])
+            for post, record in zip(posts, records)
+            for slug in record.get('tags', [])
+            if slug in tags
+        ], ignore_conflicts=True)
+
+    def import_comment(self, records):
+        users = self.users_by_username(record['author'] for record in records)
+        post_ids = dict(ImportedPost.objects.filter(
+            checkpoint=self.checkpoint, source_id__in={record['post'] for record in records}
+        ).values_list('source_id', 'post_id'))
+        comments = []
+        for record in records:
+            post_id = post_ids.get(record['post'])
+            if post_id is None or record['author'] not in users:
+                raise CommandError(f'댓글 {record["id"]}: 포스트({record["post"]}) 또는 작성자({record["author"]})가 없습니다.')
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=users[record['author']],
+                content=record['content'],
+                created_at=parse_datetime(record['created_at']),
+                modified_at=parse_datetime(record['modified_at']),
+            ))
+        self.bulk_create(Comment, comments)
+
+    def users_by_username(self, usernames):
+        return dict(User.objects.filter(username__in=set(filter(None, usernames))).values_list('username', 'pk'))
+
+    def bulk_create(self, model, objects):
+        with keep_timestamps(model):
+            return self._bulk_create(model, objects)
+
+    def _bulk_create(self, model, objects):
+        # PostgreSQL은 bulk_create가 새 pk를 돌려주지만, SQLite(Django 3.2)는 돌려주지 않으므로
+        # 트랜잭션 안에서 방금 추가한 행을 pk 순서로 다시 읽어서 맞춤
+        if connection.features.can_return_rows_from_bulk_insert:
+            return model.objects.bulk_create(objects)
+        last_pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        model.objects.bulk_create(objects)
+        pks = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+        if len(pks) != len(objects):
+            raise CommandError('가져오는 동안 다른 곳에서 같은 테이블에 저장했습니다. 다시 실행하세요.')
+        for obj, pk in zip(objects, pks):
+            obj.pk = pk
+        return objects
@@ -0,0 +1,134 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from .benchmark_views import percentile
+
+
+class Command(BaseCommand):
+    help = ('gunicorn.conf.py로 gunicorn을 워커 수를 바꿔가며 띄우고, 동시에 여러 요청을 보내서 '
+            '워커 수에 따라 처리량(초당 요청 수)이 어떻게 늘어나는지 측정합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4', help='쉼표로 구분한 워커 수 목록')
+        parser.add_argument('--worker-class', choices=['sync', 'gthread', 'uvicorn'], default='sync')
+        parser.add_argument('--threads', type=int, help='gthread 워커의 스레드 수')
+        parser.add_argument('--url', default='/blog/')
+        parser.add_argument('--concurrency', type=int, default=16, help='동시에 요청을 보내는 클라이언트 수')
+        parser.add_argument('--duration', type=float, default=10, help='워커 수마다 요청을 보내는 시간(초)')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--json', metavar='PATH', help='결과를 JSON 파일로 저장')
+
+    def handle(self, *args, **options):
+        try:
+            worker_counts = [int(n) for n in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers는 1,2,4 처럼 숫자를 쉼표로 구분해서 적어야 합니다.')
+
+        results = []
+        for workers in worker_counts:
+            server = self.start_server(workers, options)
+            try:
+                result = self.run_load(options)
+            finally:
+                self.stop_server(server)
+            result['workers'] = workers
+            results.append(result)
+
+            speedup = result['rps'] / results[0]['rps'] if results[0]['rps'] else 0
+            self.stdout.write(
+                f"workers {workers:>3}  {result['rps']:>8.1f} req/s  x{speedup:<5.2f} "
+                f"p50 {result['p50_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms  errors {result['errors']}"
+            )
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({
+                    'url': options['url'],
+                    'worker_class': options['worker_class'],
+                    'concurrency': options['concurrency'],
+                    'duration': options['duration'],
+                    'cpu_count': os.cpu_count(),
+                    'results': results,
+                }, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'saved to {options["json"]}'))
+
+    def start_server(self, workers, options):
+        env = dict(os.environ, GUNICORN_WORKER_CLASS=options['worker_class'], GUNICORN_ACCESSLOG='')
+        if options['threads']:
+            env['GUNICORN_THREADS'] = str(options['threads'])
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+             '--bind', f'127.0.0.1:{options["port"]}', '--workers', str(workers)],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn을 실행하지 못했습니다.\n{server.stderr.read().decode()}')
+            try:
+                socket.create_connection(('127.0.0.1', options['port']), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            self.stop_server(server)
+            raise CommandError('gunicorn이 30초 안에 시작되지 않았습니다.')
+
+        # 모든 워커가 준비되고 첫 요청의 캐시/연결이 만들어지도록 잠깐 요청을 보냄
+        self.run_load(dict(options, duration=1))
+        return server
+
+    def stop_server(self, server):
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    def run_load(self, options):
+        deadline = time.monotonic() + options['duration']
+
+        def client():
+            latencies = []
+            errors = 0
+            conn = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=30)
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    conn.request('GET', options['url'])
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=30)
+            conn.close()
+            return latencies, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            outcomes = list(executor.map(lambda _: client(), range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+
+        latencies = [latency for outcome in outcomes for latency in outcome[0]]
+        errors = sum(outcome[1] for outcome in outcomes)
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 2) if latencies else 0,
+            'p99_ms': round(percentile(latencies, 99), 2) if latencies else 0,
+        }
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog.models import Post
+from blog.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = '포스트 검색 색인을 처음부터 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.create_index()
+
+        # 비우고 다시 채우는 동안 다른 요청에는 예전 색인이 그대로 보이도록 한 트랜잭션으로 처리
+        # (SQLite에서는 행마다 커밋하지 않으므로 훨씬 빠름)
+        count = 0
+        with transaction.atomic():
+            backend.clear()
+            last_pk = 0
+            while True:
+                # 태그를 함께 가져오기 위해 pk 순서로 잘라서 조회
+                posts = list(
+                    Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .prefetch_related('tags')[:options['batch_size']]
+                )
+                if not posts:
+                    break
+                count += rebuild_index(posts)
+                last_pk = posts[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'{count} posts indexed'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog.caching import invalidate_group, BLOG_GROUP
+from blog.context_processors import invalidate_sidebar
+from blog.counters import refresh_category_counts, refresh_tag_counts, refresh_comment_counts
+
+
+class Command(BaseCommand):
+    help = '카테고리/태그의 포스트 수와 포스트의 댓글 수를 다시 계산합니다.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            refresh_category_counts()
+            refresh_tag_counts()
+            refresh_comment_counts()
+            # update()는 시그널을 보내지 않으므로, 커밋된 뒤 사이드바와 캐시된 페이지를 직접 지움
+            transaction.on_commit(invalidate_sidebar)
+            transaction.on_commit(lambda: invalidate_group(BLOG_GROUP))
+        self.stdout.write(self.style.SUCCESS('counters refreshed'))
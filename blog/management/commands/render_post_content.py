@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from blog.caching import BLOG_GROUP, invalidate_group
+from blog.models import Post
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('모든 포스트의 마크다운을 HTML로 다시 변환해 저장합니다. (마크다운 확장 기능을 바꾼 뒤 실행) '
+            'HTML이 바뀐 포스트는 검색 색인도 다시 만들고, 캐시된 페이지와 ETag도 새로 만들어지게 합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        count = 0
+
+        posts = Post.objects.only('pk', 'content', 'content_html', 'content_excerpt').order_by('pk')
+        for post in posts.iterator(chunk_size=batch_size):
+            rendered = (post.content_html, post.content_excerpt)
+            post.render_content()
+            if (post.content_html, post.content_excerpt) == rendered:
+                continue
+            batch.append(post)
+            if len(batch) >= batch_size:
+                count += self.flush(batch)
+                batch = []
+        if batch:
+            count += self.flush(batch)
+
+        if count:
+            # bulk_update는 시그널을 보내지 않으므로 캐시된 페이지와 ETag(blog/caching.py)를 직접 무효화
+            invalidate_group(BLOG_GROUP)
+        self.stdout.write(self.style.SUCCESS(f'{count} posts rendered'))
+
+    def flush(self, batch):
+        # save()를 거치지 않으므로 updated_at은 바뀌지 않음.
+        Post.objects.bulk_update(batch, ['content_html', 'content_excerpt'])
+        # 검색 색인은 변환된 HTML로 만들므로 바뀐 포스트만 다시 색인
+        rebuild_index(Post.objects.filter(pk__in=[post.pk for post in batch]).prefetch_related('tags'))
+        return len(batch)
@@ -0,0 +1,42 @@
+import glob
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from blog.metrics import merge_snapshots, summarize
+
+
+class Command(BaseCommand):
+    help = 'RequestMetricsMiddleware가 워커마다 저장한 URL 패턴별 요청 시간 통계를 합쳐서 보여줍니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true')
+        parser.add_argument('--reset', action='store_true', help='보여준 뒤 저장된 통계를 지움')
+
+    def handle(self, *args, **options):
+        directory = getattr(settings, 'REQUEST_METRICS_DIR', None)
+        if not directory:
+            raise CommandError('settings.REQUEST_METRICS_DIR(환경 변수 REQUEST_METRICS_DIR)가 설정되어 있지 않습니다.')
+
+        paths = glob.glob(os.path.join(directory, 'request-metrics-*.json'))
+        snapshots = []
+        for path in paths:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        summary = summarize(merge_snapshots(snapshots))
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        else:
+            self.stdout.write(f'{"route":<32}{"count":>8}{"total p50":>11}{"p95":>8}{"db p95":>8}'
+                              f'{"queries":>9}{"template":>10}{"markdown":>10}')
+            for route, item in summary.items():
+                self.stdout.write(
+                    f'{route:<32}{item["count"]:>8}{item["total"]["p50"]:>11}{item["total"]["p95"]:>8}'
+                    f'{item["db"]["p95"]:>8}{item["queries"]["mean"]:>9}'
+                    f'{item["template"]["mean"]:>10}{item["markdown"]["mean"]:>10}'
+                )
+
+        if options['reset']:
+            for path in paths:
+                os.remove(path)
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = ('로컬에서 복제 DB를 시험할 때, primary SQLite 파일을 SQL_REPLICAS의 SQLite 파일들로 복사합니다. '
+            '--every를 주면 그 간격(초)마다 반복해서 복제 지연을 흉내냅니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0, metavar='SECONDS')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('SQLite가 아닌 DB는 DB 서버의 복제 기능을 사용하세요.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('SQL_REPLICAS 환경 변수에 복제 DB 파일을 지정하세요.')
+
+        while True:
+            self.sync(primary.settings_dict['NAME'])
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def sync(self, primary_name):
+        started = time.perf_counter()
+        source = sqlite3.connect(primary_name)
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                # 쓰는 중인 primary도 일관된 상태로 복사되도록 SQLite의 온라인 백업 API를 사용
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+        self.stdout.write(
+            f'{len(settings.DATABASE_REPLICAS)} replicas synced in {(time.perf_counter() - started) * 1000:.1f}ms'
+        )
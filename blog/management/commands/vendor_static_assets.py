@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import os
+import re
+import urllib.request
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# 템플릿(blog/vendor_js.html)이 CDN에서 받던 파일과 같은 버전, 같은 integrity 값
+SCRIPTS = [
+    ('https://cdn.jsdelivr.net/npm/jquery@3.5.1/dist/jquery.slim.min.js',
+     'sha384-DfXdz2htPH0lsSSs5nCTpuj/zy4C+OGpamoFVy38MVBnE+IbbVYUew+OrCXaRkfj'),
+    ('https://cdn.jsdelivr.net/npm/popper.js@1.16.1/dist/umd/popper.min.js',
+     'sha384-9/reFTGAW83EW2RDu2S0VKaIzap3H66lZH81PoYlFhbGU+6BZp6G7niu735Sk7lN'),
+    ('https://cdn.jsdelivr.net/npm/bootstrap@4.6.2/dist/js/bootstrap.min.js',
+     'sha384-+sLIOodYLS7CIrQpBjl+C7nPvqq+FbNUBDunl/OZv93DB7Ln/533i8e/mZXLi/P+'),
+]
+
+# Font Awesome kit(kit.fontawesome.com)은 계정별 스크립트라 받아둘 수 없으므로 같은 아이콘 이름을 쓰는
+# Font Awesome Free 5의 CSS 웹폰트 버전을 사용
+FONTAWESOME_URL = 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@5.15.4/'
+
+
+class Command(BaseCommand):
+    help = ('CDN에서 불러오던 jQuery, Popper, Bootstrap JS를 하나의 파일(vendor.bundle.js)로 묶고, '
+            'Font Awesome과 함께 settings.BLOG_VENDOR_DIR(기본 blog/static/blog/vendor/)에 받아둡니다. '
+            '이후 BLOG_VENDOR_ASSETS=1 로 실행하면 템플릿이 CDN 대신 이 파일들을 사용합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-existing', action='store_true', help='이미 받아둔 파일이 있으면 아무것도 하지 않음')
+
+    def handle(self, *args, **options):
+        vendor_dir = settings.BLOG_VENDOR_DIR
+        bundle_path = os.path.join(vendor_dir, 'vendor.bundle.js')
+        css_path = os.path.join(vendor_dir, 'fontawesome', 'css', 'all.min.css')
+        if options['skip_existing'] and os.path.exists(bundle_path) and os.path.exists(css_path):
+            self.stdout.write('vendor assets already exist')
+            return
+
+        # 이미 압축(minify)된 배포 파일을 순서대로 이어 붙여서 요청 세 번을 한 번으로 줄임
+        parts = []
+        for url, integrity in SCRIPTS:
+            content = self.download(url)
+            algorithm, expected = integrity.split('-', 1)
+            actual = base64.b64encode(hashlib.new(algorithm, content).digest()).decode()
+            if actual != expected:
+                raise CommandError(f'{url} 의 integrity 값이 다릅니다.')
+            parts.append(f'/* {url} */\n'.encode() + content.rstrip() + b'\n;')
+        self.write(bundle_path, b'\n'.join(parts) + b'\n')
+
+        css = self.download(FONTAWESOME_URL + 'css/all.min.css')
+        self.write(css_path, css)
+        # CSS가 ../webfonts/ 로 참조하는 글꼴 파일도 받음 (collectstatic이 해시가 붙은 이름으로 바꿔줌)
+        fonts = sorted(set(re.findall(rb'url\(\.\./webfonts/([^)?#]+)', css)))
+        for font in fonts:
+            font = font.decode()
+            self.write(os.path.join(vendor_dir, 'fontawesome', 'webfonts', font),
+                       self.download(FONTAWESOME_URL + 'webfonts/' + font))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'vendor.bundle.js ({len(SCRIPTS)} scripts), fontawesome ({len(fonts)} fonts) saved to {os.path.normpath(vendor_dir)}'
+        ))
+
+    def download(self, url):
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                return response.read()
+        except OSError as e:
+            raise CommandError(f'{url} 을 받지 못했습니다: {e}')
+
+    def write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.template.backends.django import DjangoTemplates, Template
+
+# 요청 하나 동안 어디에 시간이 쓰였는지 모으는 도구.
+# blog.middleware.RequestMetricsMiddleware가 요청마다 RequestMetrics를 만들고,
+# DB 쿼리, 템플릿 렌더링, 마크다운 변환 시간을 여기에 더함.
+
+_current = ContextVar('blog_request_metrics', default=None)
+
+# 히스토그램 구간(ms)
+BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf')]
+TIMINGS = ('total', 'db', 'template', 'markdown')
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db = 0.0
+        self.db_count = 0
+        self.template = 0.0
+        self.markdown = 0.0
+        self._template_depth = 0
+        self.lock = threading.Lock()
+
+    def add_query(self, duration):
+        # async 뷰에서는 여러 스레드가 동시에 쿼리를 실행하므로 잠금
+        with self.lock:
+            self.db += duration
+            self.db_count += 1
+
+    def finish(self):
+        self.total = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        return ', '.join([
+            f'total;dur={self.total:.1f}',
+            f'db;dur={self.db:.1f};desc="{self.db_count} queries"',
+            f'template;dur={self.template:.1f}',
+            f'markdown;dur={self.markdown:.1f}',
+        ])
+
+
+def start(metrics):
+    return _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def active(metrics):
+    token = start(metrics)
+    try:
+        yield metrics
+    finally:
+        stop(token)
+
+
+@contextmanager
+def timer(name):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, name, getattr(metrics, name) + (time.perf_counter() - started) * 1000)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query((time.perf_counter() - started) * 1000)
+
+
+def _add_db_wrapper(sender=None, connection=None, **kwargs):
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
+
+
+def install_db_timer():
+    # async 뷰는 쿼리를 다른 스레드(다른 연결)에서 실행하므로 요청마다 연결을 감싸지 않고,
+    # 모든 연결에 db_wrapper를 한 번 붙여두고 contextvar로 지금 요청의 RequestMetrics를 찾음.
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_add_db_wrapper, dispatch_uid='blog_metrics_db_timer')
+    for connection in connections.all():
+        _add_db_wrapper(connection=connection)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        # include, crispy 폼처럼 템플릿 안에서 다시 render()가 불리는 경우는 바깥쪽 한 번만 셈.
+        metrics = _current.get()
+        if metrics is None or metrics._template_depth:
+            return super(TimedTemplate, self).render(context, request)
+        metrics._template_depth += 1
+        try:
+            with timer('template'):
+                return super(TimedTemplate, self).render(context, request)
+        finally:
+            metrics._template_depth -= 1
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    # 렌더링 시간을 재는 템플릿 백엔드 (settings.TEMPLATES의 BACKEND). 그 밖에는 DjangoTemplates와 같음.
+
+    def from_string(self, template_code):
+        return TimedTemplate(super(TimedDjangoTemplates, self).from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super(TimedDjangoTemplates, self).get_template(template_name).template, self)
+
+
+class Histogram:
+    def __init__(self, data=None):
+        data = data or {}
+        self.counts = data.get('counts', [0] * len(BUCKETS))
+        self.count = data.get('count', 0)
+        self.sum = data.get('sum', 0.0)
+        self.max = data.get('max', 0.0)
+
+    def add(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        # 구간의 위쪽 경계값으로 근사
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'sum': self.sum, 'max': self.max}
+
+
+class MetricsRegistry:
+    # URL 패턴별 히스토그램. 프로세스(워커)마다 하나씩 있음.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.recorded = 0
+
+    def record(self, route, metrics):
+        with self.lock:
+            histograms = self.routes.setdefault(route, {'queries': Histogram(), **{t: Histogram() for t in TIMINGS}})
+            for name in TIMINGS:
+                histograms[name].add(getattr(metrics, name))
+            histograms['queries'].add(metrics.db_count)
+            self.recorded += 1
+            return self.recorded
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                route: {name: histogram.to_dict() for name, histogram in histograms.items()}
+                for route, histograms in self.routes.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def dump(self, directory):
+        # 워커마다 다른 파일에 저장하고, request_metrics 관리 명령에서 합쳐서 보여줌.
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'request-metrics-{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+
+registry = MetricsRegistry()
+
+
+def merge_snapshots(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for route, histograms in snapshot.items():
+            target = merged.setdefault(route, {})
+            for name, data in histograms.items():
+                target.setdefault(name, Histogram()).merge(Histogram(data))
+    return merged
+
+
+def summarize(merged):
+    summary = {}
+    for route, histograms in sorted(merged.items()):
+        summary[route] = {'count': histograms['total'].count}
+        for name, histogram in histograms.items():
+            summary[route][name] = {
+                'mean': round(histogram.sum / histogram.count, 2) if histogram.count else 0,
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95),
+                'max': round(histogram.max, 2),
+            }
+    return summary
@@ -0,0 +1,105 @@
+import asyncio
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import empty
+from . import metrics
+from .querylog import new_query_log
+from .streaming import wrap_streaming_content
+
+
+class RequestMetricsMiddleware:
+    # 요청마다 전체 시간, DB 쿼리 수/시간, 템플릿 렌더링 시간, 마크다운 변환 시간을 재서
+    # URL 패턴별 히스토그램(blog/metrics.py)에 모음. 스태프, DEBUG이면 Server-Timing 헤더로도 보냄.
+    # 템플릿 시간은 settings.TEMPLATES의 blog.metrics.TimedDjangoTemplates 백엔드가 잼.
+    # ASGI의 async 뷰(blog/async_views.py)에서도 동작하도록 sync/async 둘 다 지원.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.install_db_timer()
+        if asyncio.iscoroutinefunction(get_response):
+            # Django가 이 미들웨어를 async로 호출하도록 표시 (django.utils.deprecation.MiddlewareMixin과 같은 방법)
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.start(request_metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        return self.record(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.start(request_metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.stop(token)
+        return self.record(request, response, request_metrics)
+
+    def record(self, request, response, request_metrics):
+        request_metrics.finish()
+
+        if self.show_server_timing(request):
+            # 스트리밍 응답(blog/streaming.py)은 헤더를 먼저 보내므로 본문 앞부분까지의 시간만 들어감
+            response['Server-Timing'] = request_metrics.server_timing()
+
+        if response.streaming:
+            # 본문을 보내는 동안 실행되는 쿼리도 세고, 다 보낸 뒤에 히스토그램에 기록
+            def save():
+                request_metrics.finish()
+                self.save(request, request_metrics)
+            return wrap_streaming_content(response, lambda: metrics.active(request_metrics), save)
+
+        self.save(request, request_metrics)
+        return response
+
+    def save(self, request, request_metrics):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.route if resolver_match else '(unmatched)'
+        recorded = metrics.registry.record(route or '/', request_metrics)
+
+        directory = getattr(settings, 'REQUEST_METRICS_DIR', None)
+        if directory and recorded % getattr(settings, 'REQUEST_METRICS_DUMP_EVERY', 100) == 0:
+            metrics.registry.dump(directory)
+
+    def show_server_timing(self, request):
+        # 내부 처리 시간은 공개하지 않음
+        if settings.DEBUG or getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', False):
+            return True
+        # 요청 중에 이미 불러온 사용자만 확인. 여기서 새로 조회하지 않음 (async에서는 조회할 수도 없음)
+        user = getattr(request, 'user', None)
+        if user is None or getattr(user, '_wrapped', None) is empty:
+            return False
+        return user.is_staff
+
+
+class QueryLogMiddleware:
+    # settings.BLOG_QUERY_LOG가 켜져 있을 때만 동작. 느린 쿼리와 반복되는 쿼리를 blog/querylog.py로 기록.
+    # 디버깅용이라 sync만 지원함. async 뷰(blog/async_views.py)가 다른 스레드에서 실행하는 쿼리는
+    # 기록되지 않으므로 WSGI로 실행해서 사용.
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_QUERY_LOG', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_log = new_query_log(request.path)
+        request._query_log = query_log
+        with query_log.capture():
+            response = self.get_response(request)
+        if response.streaming:
+            # 스트리밍 응답(blog/streaming.py)은 본문을 보내면서 실행하는 쿼리까지 모아서 다 보낸 뒤에 기록
+            return wrap_streaming_content(response, query_log.capture, query_log.report)
+        query_log.report()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # 이후 쿼리는 경로 대신 뷰 이름으로 기록
+        request._query_log.view = request.resolver_match.view_name
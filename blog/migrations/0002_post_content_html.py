@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.utils.text import Truncator
+from markdownx.utils import markdown
+
+
+def render_existing_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = list(Post.objects.only('pk', 'content'))
+    for post in posts:
+        post.content_html = markdown(post.content)
+        post.content_excerpt = Truncator(post.content_html).words(45, html=True, truncate=' …')
+    Post.objects.bulk_update(posts, ['content_html', 'content_excerpt'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
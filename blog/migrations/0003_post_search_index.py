@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from blog.search import get_backend, rebuild_index
+
+
+def create_search_index(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    get_backend(schema_editor.connection).create_index()
+    rebuild_index(Post.objects.prefetch_related('tags'), schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    get_backend(schema_editor.connection).drop_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_content_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
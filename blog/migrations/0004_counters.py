@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-18 21:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Category = apps.get_model('blog', 'Category')
+    Tag = apps.get_model('blog', 'Tag')
+    Comment = apps.get_model('blog', 'Comment')
+
+    def count(queryset, field):
+        counts = queryset.order_by().values(field).annotate(count=Count('pk')).values('count')
+        return Coalesce(Subquery(counts), 0)
+
+    Category.objects.update(post_count=count(Post.objects.filter(category=OuterRef('pk')), 'category'))
+    Tag.objects.update(post_count=count(Post.tags.through.objects.filter(tag=OuterRef('pk')), 'tag'))
+    Post.objects.update(comment_count=count(Comment.objects.filter(post=OuterRef('pk')), 'post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 21:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='head_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
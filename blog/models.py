@@ -1,15 +1,47 @@
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import User
 from markdownx.models import MarkdownxField
 from markdownx.utils import markdown
+from .avatars import get_avatar_url
+from . import metrics, images
+from django.utils.text import Truncator
 import os
 
 
-class Tag(models.Model):
-    name = models.CharField(max_length=50)
+class CounterFieldsMixin:
+    # 카운터 컬럼은 시그널(blog/signals.py, blog/counters.py)에서만 갱신함.
+    # 예전에 읽어온 값으로 덮어쓰지 않도록 이미 저장된 객체를 save()할 때는 카운터 컬럼을 빼고 저장.
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            if self.pk is not None and self.row_exists(kwargs.get('using')):
+                kwargs['update_fields'] = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name not in self.counter_fields
+                ]
+            else:
+                # pk를 None으로 바꿔 복사했거나 지워진 행을 다시 저장하는 경우 -> update_fields 없이 새 행으로 INSERT.
+                # 새 행에는 아직 연결된 포스트/댓글이 없으므로 카운터는 0에서 시작(시그널이 다시 계산함).
+                for name in self.counter_fields:
+                    setattr(self, name, 0)
+        super(CounterFieldsMixin, self).save(*args, **kwargs)
+
+    def row_exists(self, using=None):
+        using = using or router.db_for_write(type(self), instance=self)
+        return type(self)._base_manager.using(using).filter(pk=self.pk).exists()
+
+
+class Tag(CounterFieldsMixin, models.Model):
+    # 포스트를 저장할 때마다 이름으로 태그를 찾으므로 색인을 둠.
+    name = models.CharField(max_length=50, db_index=True)
     slug = models.SlugField(max_length=50, unique=True, allow_unicode=True)
     # slug = models.SlugField(max_length=50, allow_unicode=True)
 
+    # 이 태그가 달린 포스트 수
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('post_count',)
+
     def __str__(self):
         return self.name
 
@@ -17,7 +49,7 @@ class Tag(models.Model):
         return f'/blog/tag/{self.slug}/'
 
 
-class Category(models.Model):
+class Category(CounterFieldsMixin, models.Model):
     # unique=True : 동일한 이름 사용 안되게.
     name = models.CharField(max_length=50, unique=True)
 
@@ -27,6 +59,10 @@ class Category(models.Model):
     # slug = models.SlugField(max_length=50, unique=True, allow_unicode=True)
     slug = models.SlugField(max_length=50, unique=True, allow_unicode=True)
 
+    # 이 카테고리의 포스트 수
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('post_count',)
+
     def __str__(self):
         return self.name
 
@@ -37,13 +73,21 @@ class Category(models.Model):
         verbose_name_plural = 'Categories'
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def with_relations(self):
+        # 목록에서 쓰는 category, author, tags를 포스트마다 따로 조회하지 않도록 한꺼번에 가져옴.
+        return self.select_related('category', 'author').prefetch_related('tags')
+
+
+class Post(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=30)
     hook_text = models.CharField(max_length=100, blank=True)
     # content = models.TextField()
     content = MarkdownxField()
 
     head_image = models.ImageField(upload_to='blog/images/%Y/%m/%d/', blank=True)
+    # head_image를 줄이고 다시 압축한 파일들(blog/images.py). 목록/상세 페이지에서 srcset으로 사용.
+    head_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     file_upload = models.FileField(upload_to='blog/files/%Y/%m/%d/', blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -58,9 +102,64 @@ class Post(models.Model):
     # ManyToManyField는 기본적으로 null=True라 쓰지 않아야함.
     tags = models.ManyToManyField(Tag, blank=True)
 
+    # 마크다운을 저장할 때 한 번만 HTML로 변환해 두고, 목록/상세 페이지에서는 저장된 값을 그대로 사용.
+    content_html = models.TextField(blank=True, editable=False)
+    # 목록 페이지 카드에 보여줄 요약(truncatewords_html:45 와 같은 결과)
+    content_excerpt = models.TextField(blank=True, editable=False)
+
+    # 댓글 수
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('comment_count',)
+
+    EXCERPT_WORDS = 45
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='blog_post_created_at_idx'),
+            # 목록 페이지의 ETag(가장 최근 수정 시각)를 구할 때 사용
+            models.Index(fields=['updated_at'], name='blog_post_updated_at_idx'),
+            # 사이드바의 미분류 포스트 수. 카테고리가 없는 포스트만 담는 부분 색인.
+            models.Index(fields=['id'], condition=models.Q(category__isnull=True),
+                         name='blog_post_no_category_idx'),
+        ]
+
     def __str__(self):
         return f'[{self.pk}] {self.title} :: {self.author}'
 
+    def save(self, *args, **kwargs):
+        self.render_content()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'content_html', 'content_excerpt'}
+        super(Post, self).save(*args, **kwargs)
+        # 이미지 파일은 super().save() 안에서 저장되므로 그 다음에 줄인 이미지를 만듦
+        if update_fields is None or 'head_image' in update_fields:
+            self.update_head_image_variants()
+
+    def update_head_image_variants(self):
+        name = self.head_image.name or ''
+        if self.head_image_variants.get('source', '') == name:
+            return
+        images.delete_variants(self.head_image_variants)
+        self.head_image_variants = images.safe_generate_variants(name) if name else {}
+        # save()를 다시 부르면 시그널이 또 실행되므로 이 컬럼만 바로 저장
+        Post.objects.filter(pk=self.pk).update(head_image_variants=self.head_image_variants)
+
+    def get_head_image_sources(self):
+        # 템플릿에서 {% with image=p.get_head_image_sources.card %} 처럼 사용.
+        # 줄인 이미지가 없으면(변환 실패, 아직 backfill 전) 원본을 그대로 보여줌.
+        sources = {}
+        for kind in images.VARIANT_WIDTHS:
+            sources[kind] = images.get_sources(self.head_image_variants, kind) or {'src': self.head_image.url}
+        return sources
+
+    def render_content(self):
+        with metrics.timer('markdown'):
+            self.content_html = markdown(self.content)
+        self.content_excerpt = Truncator(self.content_html).words(self.EXCERPT_WORDS, html=True, truncate=' …')
+
     def get_absolute_url(self):
         return f'/blog/{self.pk}/'
 
@@ -71,13 +170,18 @@ class Post(models.Model):
         return self.get_file_name().split('.')[-1]
 
     def get_content_markdown(self):
-        return markdown(self.content)
+        if self.content_html:
+            return self.content_html
+        with metrics.timer('markdown'):
+            return markdown(self.content)
+
+    def get_content_excerpt(self):
+        if self.content_excerpt:
+            return self.content_excerpt
+        return Truncator(self.get_content_markdown()).words(self.EXCERPT_WORDS, html=True, truncate=' …')
 
     def get_avatar_url(self):
-        if self.author.socialaccount_set.exists():
-            return self.author.socialaccount_set.first().get_avatar_url()
-        else:
-            return f'https://doitdjango.com/avatar/id/1369/720e6b0110aee476/svg/{self.author.email}'
+        return get_avatar_url(self.author)
 
 
 class Comment(models.Model):
@@ -90,6 +194,11 @@ class Comment(models.Model):
     # modified_at 저장될 때 시간을 저장 auto_now=True
     modified_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # 포스트별 댓글을 작성 순서대로 가져올 때 사용
+            models.Index(fields=['post', 'created_at'], name='blog_comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.author}::{self.content}'
@@ -98,7 +207,22 @@ class Comment(models.Model):
         return f'{self.post.get_absolute_url()}#comment-{self.pk}'
 
     def get_avatar_url(self):
-        if self.author.socialaccount_set.exists():
-            return self.author.socialaccount_set.first().get_avatar_url()
-        else:
-            return f'https://doitdjango.com/avatar/id/1369/720e6b0110aee476/svg/{self.author.email}'
\ No newline at end of file
+        return get_avatar_url(self.author)
+
+class ImportCheckpoint(models.Model):
+    # import_blog의 진행 상황. 묶음을 저장하는 트랜잭션 안에서 함께 갱신하므로 중간에 멈춰도 저장된 묶음과 항상 일치함.
+    source = models.CharField(max_length=255, unique=True)
+    line = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.source}:{self.line}'
+
+
+class ImportedPost(models.Model):
+    # 내보낸 DB의 포스트 id -> 이 DB의 포스트 (댓글을 연결할 때 사용). 포스트 묶음마다 새 행만 추가함.
+    checkpoint = models.ForeignKey(ImportCheckpoint, on_delete=models.CASCADE)
+    source_id = models.PositiveIntegerField()
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = [('checkpoint', 'source_id')]
@@ -0,0 +1,143 @@
+from django.core.paginator import Paginator, Page
+from django.http import Http404
+
+
+class KeysetPage:
+    # 페이지 번호 대신 마지막으로 본 포스트의 pk를 기준으로 이전/다음 페이지를 찾음.
+    # 템플릿에서는 Django의 Page와 같은 이름(has_next, has_previous ...)으로 사용.
+
+    def __init__(self, object_list, has_next, has_previous, before=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous and (bool(object_list) or before is not None)
+        self._before = before
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_url(self):
+        return f'?before={self.object_list[-1].pk}'
+
+    def previous_page_url(self):
+        if not self.object_list:
+            # 더 오래된 포스트가 없는 빈 페이지에서는 before 바로 앞부터 다시 보여줌.
+            return f'?after={self._before - 1}'
+        return f'?after={self.object_list[0].pk}'
+
+
+class KeysetPaginator:
+    # queryset은 '-pk' 순서로 정렬되어 있어야 함.
+    # COUNT(*)와 OFFSET 없이 pk 범위 조건(pk < before)으로 찾기 때문에 뒤쪽 페이지도 첫 페이지만큼 빠름.
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, params):
+        try:
+            if params.get('before'):
+                return self.page_before(int(params['before']))
+            if params.get('after'):
+                return self.page_after(int(params['after']))
+            if params.get('page'):
+                return self.page_number(int(params['page']))
+        except ValueError:
+            raise Http404('잘못된 페이지입니다.')
+        return self.first_page()
+
+    def first_page(self):
+        rows = list(self.queryset[:self.per_page + 1])
+        return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, False)
+
+    def page_before(self, pk):
+        rows = list(self.queryset.filter(pk__lt=pk)[:self.per_page + 1])
+        return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, True, before=pk)
+
+    def page_after(self, pk):
+        rows = list(self.queryset.filter(pk__gt=pk).order_by('pk')[:self.per_page + 1])
+        if not rows:
+            return self.first_page()
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, True, has_previous)
+
+    def page_number(self, number):
+        # 예전 ?page= 주소도 지원. COUNT(*) 없이 한 개를 더 가져와서 다음 페이지가 있는지 확인.
+        if number < 1:
+            raise Http404('잘못된 페이지입니다.')
+        offset = (number - 1) * self.per_page
+        rows = list(self.queryset[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            raise Http404('잘못된 페이지입니다.')
+        return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, number > 1)
+
+
+class NumberedPage(Page):
+    # 관련도 순으로 정렬되는 검색 결과처럼 pk 기준으로 자를 수 없는 목록에서 사용.
+
+    def next_page_url(self):
+        return f'?page={self.next_page_number()}'
+
+    def previous_page_url(self):
+        return f'?page={self.previous_page_number()}'
+
+
+class NumberedPaginator(Paginator):
+    def _get_page(self, *args, **kwargs):
+        return NumberedPage(*args, **kwargs)
+
+
+class CommentPage:
+    # 최신 댓글부터 잘라서 가져오지만 화면에는 작성 순서(오래된 것부터)대로 보여줌.
+    # 더 오래된 댓글은 older_url()로 조각(blog/comment_page.html)만 받아서 앞에 붙임.
+
+    def __init__(self, post_id, object_list, has_older):
+        self.post_id = post_id
+        self.object_list = object_list
+        self._has_older = has_older
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_older(self):
+        return self._has_older
+
+    def older_url(self):
+        return f'/blog/{self.post_id}/comments/?before={self.object_list[0].pk}'
+
+
+class CommentPaginator:
+    # 댓글은 작성 순서대로 pk가 커지므로 pk 범위 조건(pk < before)으로 이전 댓글을 찾음.
+    # per_page가 0이면 모든 댓글을 한 번에 보여줌.
+
+    def __init__(self, post_id, queryset, per_page):
+        self.post_id = post_id
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, before=None):
+        queryset = self.queryset.filter(post_id=self.post_id)
+        if before is not None:
+            queryset = queryset.filter(pk__lt=before)
+        if not self.per_page:
+            return CommentPage(self.post_id, list(queryset.order_by('pk')), False)
+        rows = list(queryset.order_by('-pk')[:self.per_page + 1])
+        page_rows = rows[:self.per_page]
+        page_rows.reverse()
+        return CommentPage(self.post_id, page_rows, len(rows) > self.per_page)
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+
+# 느린 쿼리와 한 요청 안에서 같은 SQL이 여러 번 실행되는 경우(N+1)를 'blog.queries' 로거로 남김.
+# settings.BLOG_QUERY_LOG가 켜져 있을 때만 blog.middleware.QueryLogMiddleware가 사용함.
+
+logger = logging.getLogger('blog.queries')
+
+PROJECT_DIR = str(settings.BASE_DIR)
+LIBRARY_DIRS = tuple(path for path in sys.path if 'site-packages' in path or 'dist-packages' in path)
+
+
+def find_origin():
+    # 쿼리를 실행한 템플릿 줄과 프로젝트 코드 위치를 호출 스택에서 찾음
+    origin = {}
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if 'template' not in origin and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            node_origin = getattr(node, 'origin', None)
+            if token is not None and node_origin is not None:
+                origin['template'] = f'{node_origin.template_name}:{token.lineno}'
+        if 'code' not in origin and code.co_filename.startswith(PROJECT_DIR) \
+                and not code.co_filename.startswith(LIBRARY_DIRS) \
+                and not code.co_filename.endswith(('querylog.py', 'metrics.py', 'middleware.py')):
+            origin['code'] = f'{os.path.relpath(code.co_filename, PROJECT_DIR)}:{frame.f_lineno} in {code.co_name}'
+        if 'template' in origin and 'code' in origin:
+            break
+        frame = frame.f_back
+    return origin
+
+
+class QueryLog:
+    def __init__(self, view, slow_ms, duplicate_threshold):
+        self.view = view
+        self.slow_ms = slow_ms
+        self.duplicate_threshold = duplicate_threshold
+        self.queries = {}
+
+    @contextmanager
+    def capture(self):
+        # 모든 연결의 쿼리를 이 기록에 모음
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            alias = context['connection'].alias
+            item = self.queries.setdefault(sql, {'count': 0, 'duration': 0.0, 'alias': alias})
+            item['count'] += 1
+            item['duration'] += duration
+            if item['count'] == self.duplicate_threshold:
+                # 반복이 확인된 시점의 호출 위치만 기록 (매 쿼리마다 스택을 뒤지지 않도록)
+                item['origin'] = find_origin()
+            if duration >= self.slow_ms:
+                logger.warning('slow query', extra={'query': {
+                    'event': 'slow',
+                    'view': self.view,
+                    'alias': alias,
+                    'duration_ms': round(duration, 2),
+                    'sql': sql,
+                    'params': repr(params)[:500],
+                    **find_origin(),
+                }})
+
+    def report(self):
+        for sql, item in self.queries.items():
+            if item['count'] >= self.duplicate_threshold:
+                logger.warning('duplicate query', extra={'query': {
+                    'event': 'duplicate',
+                    'view': self.view,
+                    'alias': item['alias'],
+                    'count': item['count'],
+                    'duration_ms': round(item['duration'], 2),
+                    'sql': sql,
+                    **item.get('origin', {}),
+                }})
+
+
+def new_query_log(view):
+    return QueryLog(
+        view,
+        slow_ms=getattr(settings, 'BLOG_SLOW_QUERY_MS', 100),
+        duplicate_threshold=getattr(settings, 'BLOG_DUPLICATE_QUERY_THRESHOLD', 3),
+    )
+
+
+@contextmanager
+def log_queries(view):
+    query_log = new_query_log(view)
+    with query_log.capture():
+        yield query_log
+    query_log.report()
+
+
+class JsonFormatter(logging.Formatter):
+    # 한 줄에 JSON 하나 (JSON Lines)
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'query', {}))
+        return json.dumps(data, ensure_ascii=False)
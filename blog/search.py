@@ -0,0 +1,267 @@
+from django.db import connection as default_connection, connections
+from django.db.models import Case, When
+from django.utils.html import strip_tags
+
+SEARCH_TABLE = 'blog_post_search'
+
+
+def build_document(post):
+    # 마크다운 원문 대신 변환된 HTML에서 태그를 뺀 본문을 색인함.
+    return {
+        'title': post.title,
+        'hook_text': post.hook_text,
+        'content': strip_tags(post.content_html or post.content),
+        'tags': ' '.join(tag.name for tag in post.tags.all()),
+    }
+
+
+class SqliteSearchBackend:
+    # SQLite FTS5 가상 테이블. rowid가 포스트의 pk.
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+                f"USING fts5(title, hook_text, content, tags, tokenize='unicode61')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def update(self, post_id, document):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id])
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, hook_text, content, tags) VALUES (%s, %s, %s, %s, %s)',
+                [post_id, document['title'], document['hook_text'], document['content'], document['tags']]
+            )
+
+    def remove(self, post_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id])
+
+    def match(self, terms):
+        # 각 단어를 접두어 검색으로 바꿈. ("파이썬" -> "파이썬"* 이면 '파이썬에'도 찾음)
+        return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+    def search(self, terms, limit, offset=0):
+        with self.connection.cursor() as cursor:
+            # bm25 가중치 : title, hook_text, content, tags
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+                f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 5.0, 1.0, 5.0), rowid DESC LIMIT %s OFFSET %s',
+                [self.match(terms), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, terms):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [self.match(terms)])
+            return cursor.fetchone()[0]
+
+
+class PostgresSearchBackend:
+    # tsvector 컬럼과 GIN 인덱스를 가진 별도 테이블. 한국어 사전이 없으므로 'simple' 설정 사용.
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+                f'post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_gin ON {SEARCH_TABLE} USING GIN (document)'
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def update(self, post_id, document):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (post_id, document) VALUES (%s, '
+                f"setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B') || "
+                f"setweight(to_tsvector('simple', %s), 'D') || setweight(to_tsvector('simple', %s), 'B')) "
+                f'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+                [post_id, document['title'], document['hook_text'], document['content'], document['tags']]
+            )
+
+    def remove(self, post_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE post_id = %s', [post_id])
+
+    def query(self, terms):
+        return ' & '.join(
+            "'" + term.replace('\\', '\\\\').replace("'", "''") + "':*" for term in terms
+        )
+
+    def search(self, terms, limit, offset=0):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT post_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query "
+                f'WHERE document @@ query ORDER BY ts_rank(document, query) DESC, post_id DESC LIMIT %s OFFSET %s',
+                [self.query(terms), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, terms):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+                [self.query(terms)]
+            )
+            return cursor.fetchone()[0]
+
+
+class SimpleSearchBackend:
+    # 그 밖의 데이터베이스에서는 색인 없이 LIKE 검색.
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def update(self, post_id, document):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def matching_ids(self, terms):
+        from django.db.models import Q
+        from .models import Post
+
+        condition = Q()
+        for term in terms:
+            condition &= (Q(title__icontains=term) | Q(hook_text__icontains=term)
+                          | Q(content__icontains=term) | Q(tags__name__icontains=term))
+        return Post.objects.using(self.connection.alias).filter(condition).values_list('pk', flat=True).distinct()
+
+    def search(self, terms, limit, offset=0):
+        return list(self.matching_ids(terms).order_by('-pk')[offset:offset + limit])
+
+    def count(self, terms):
+        return self.matching_ids(terms).count()
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    if connection.vendor == 'sqlite':
+        return SqliteSearchBackend(connection)
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend(connection)
+    return SimpleSearchBackend(connection)
+
+
+def index_post(post):
+    get_backend().update(post.pk, build_document(post))
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def rebuild_index(posts, connection=None):
+    backend = get_backend(connection)
+    count = 0
+    for post in posts:
+        backend.update(post.pk, build_document(post))
+        count += 1
+    return count
+
+
+class SearchResults:
+    # 검색 결과 목록. Paginator가 사용하는 count()와 슬라이싱을 색인 쿼리의 COUNT(*)와 LIMIT/OFFSET으로 처리해서
+    # 결과가 아무리 많아도 한 페이지 분량의 id만 가져오고, 그 포스트들만 queryset으로 다시 조회함.
+
+    ordered = True
+
+    def __init__(self, terms, queryset):
+        self.terms = terms
+        self.queryset = queryset
+        self.model = queryset.model
+        self._count = None
+
+    def _clone(self, queryset):
+        return SearchResults(self.terms, queryset)
+
+    def with_relations(self):
+        return self._clone(self.queryset.with_relations())
+
+    def prefetch_related(self, *lookups):
+        return self._clone(self.queryset.prefetch_related(*lookups))
+
+    def backend(self):
+        # 색인도 포스트와 같은 DB에서 읽음 (복제 DB로 읽는 요청이면 복제 DB의 색인)
+        return get_backend(connections[self.queryset.db])
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend().count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def fetch(self, limit, offset=0):
+        post_ids = self.backend().search(self.terms, limit, offset) if self.terms else []
+        if not post_ids:
+            return []
+        # 검색 순위대로 정렬
+        ranking = Case(*[When(pk=pk, then=position) for position, pk in enumerate(post_ids)])
+        return list(self.queryset.filter(pk__in=post_ids).order_by(ranking))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step is not None or (key.start or 0) < 0 or (key.stop is not None and key.stop < 0):
+                raise ValueError('음수 인덱스나 step은 지원하지 않습니다.')
+            start = key.start or 0
+            stop = self.count() if key.stop is None else key.stop
+            return self.fetch(max(stop - start, 0), start)
+        rows = self.fetch(1, key)
+        if not rows:
+            raise IndexError(key)
+        return rows[0]
+
+    def iterator(self, chunk_size=100):
+        # 페이지를 나누지 않는 목록(blog/streaming.py)에서 색인을 chunk_size개씩 읽음
+        offset = 0
+        while True:
+            rows = self.fetch(chunk_size, offset)
+            yield from rows
+            if len(rows) < chunk_size:
+                break
+            offset += chunk_size
+
+    def __iter__(self):
+        return self.iterator()
+
+
+def search_posts(q):
+    from .models import Post
+
+    return SearchResults(q.split(), Post.objects.all())
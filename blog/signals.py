@@ -0,0 +1,149 @@
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.db import transaction
+from django.contrib.auth.models import User
+from allauth.socialaccount.models import SocialAccount
+from .models import Post, Category, Tag, Comment
+from .context_processors import invalidate_sidebar
+from .avatars import invalidate_avatar_url
+from .caching import invalidate_group, post_group, BLOG_GROUP
+from . import search
+from . import counters
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # tag.post_set.clear() 는 pk_set을 넘겨주지 않으므로 미리 저장해 둠.
+        instance._search_post_ids = list(instance.post_set.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        search.index_post(instance)
+    elif action == 'post_clear':
+        reindex_posts(getattr(instance, '_search_post_ids', []))
+    else:
+        reindex_posts(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        reindex_posts(instance.post_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    instance._search_post_ids = list(instance.post_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    reindex_posts(getattr(instance, '_search_post_ids', []))
+
+
+def reindex_posts(post_ids):
+    for post in Post.objects.filter(pk__in=list(post_ids)).prefetch_related('tags'):
+        search.index_post(post)
+
+
+# allauth에서 소셜 계정을 연결/해제하거나 정보가 갱신되면 SocialAccount가 저장/삭제됨.
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def social_account_changed(sender, instance, **kwargs):
+    invalidate_avatar_url(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # 기본 아바타 주소에 email이 들어가므로 사용자 정보가 바뀌면 다시 계산.
+    invalidate_avatar_url(instance.pk)
+
+
+# 카운터 컬럼(Category.post_count, Tag.post_count, Post.comment_count) 갱신
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_category_id = Post.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    old_category_id = getattr(instance, '_old_category_id', None)
+    if created or old_category_id != instance.category_id:
+        counters.refresh_category_counts([old_category_id, instance.category_id])
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # 포스트가 지워지면 태그 연결도 함께 지워지지만 m2m_changed 시그널은 오지 않음.
+    instance._counter_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.refresh_category_counts([instance.category_id])
+    counters.refresh_tag_counts(getattr(instance, '_counter_tag_ids', []))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tag_counts_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and not reverse:
+        instance._counter_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    if action in ('post_add', 'post_remove'):
+        counters.refresh_tag_counts([instance.pk] if reverse else pk_set)
+    elif action == 'post_clear':
+        counters.refresh_tag_counts([instance.pk] if reverse else getattr(instance, '_counter_tag_ids', []))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.refresh_comment_counts([instance.post_id])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.refresh_comment_counts([instance.post_id])
+
+
+# 캐시 무효화. post_save/post_delete는 트랜잭션이 커밋되기 전에 오므로, 그 사이에 다른 요청이
+# 커밋 전 데이터로 캐시를 다시 채우지 않도록 커밋된 뒤에 지움(트랜잭션 밖이면 바로 실행).
+# 위의 카운터 갱신보다 나중에 실행되도록 맨 아래에 둠.
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def sidebar_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_sidebar)
+
+
+# 페이지 캐시(blog/caching.py) 무효화
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def blog_pages_changed(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate_group(BLOG_GROUP))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def post_comments_changed(sender, instance, **kwargs):
+    group = post_group(instance.post_id)
+    transaction.on_commit(lambda: invalidate_group(group))
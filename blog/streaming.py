@@ -0,0 +1,80 @@
+import itertools
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.template.context import make_context
+from django.template.loader import get_template, render_to_string
+
+# 페이지를 나누지 않는 목록(BLOG_POSTS_PER_PAGE = 0)은 포스트가 아무리 많아도 전체 HTML을 메모리에 만들지 않고,
+# 머리 부분(내비게이션, 제목)을 먼저 보낸 뒤 포스트 카드를 DB에서 조금씩 읽으면서 보내고, 마지막에 사이드바와 꼬리 부분을 보냄.
+
+# blog/post_list.html에서 카드가 들어갈 자리
+POST_CARDS_MARKER = '<!-- blog:post-cards -->'
+
+
+def stream_post_list(request, template_names, context, queryset):
+    # 첫 묶음을 먼저 읽어서 포스트가 없으면 None (보통 페이지로 '아직 게시물이 없습니다.'를 보여줌).
+    # 따로 exists() 쿼리를 보내지 않음.
+    chunk_size = getattr(settings, 'BLOG_STREAM_CHUNK_SIZE', 100)
+    # iterator()는 prefetch_related를 무시하므로 태그는 묶음마다 한 번에 가져옴
+    post_chunks = chunks(queryset.prefetch_related(None).iterator(chunk_size=chunk_size), chunk_size)
+    first_chunk = next(post_chunks, None)
+    if first_chunk is None:
+        return None
+
+    html = render_to_string(template_names, dict(context, streaming=True), request)
+    head, tail = html.split(POST_CARDS_MARKER, 1)
+    return StreamingHttpResponse(
+        stream_post_cards(request, head, tail, itertools.chain([first_chunk], post_chunks)),
+        content_type='text/html; charset=utf-8',
+    )
+
+
+def wrap_streaming_content(response, around_chunk, on_close=None):
+    # StreamingHttpResponse의 본문은 미들웨어가 끝난 뒤(서버가 보낼 때) 만들어지므로, 미들웨어가 걸어둔
+    # contextvar나 DB 래퍼를 around_chunk()로 묶음마다 다시 적용하고, 다 보내거나 연결이 끊기면 on_close()를 부름.
+    content = iter(response.streaming_content)
+
+    def wrapped():
+        try:
+            while True:
+                with around_chunk():
+                    chunk = next(content, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            if on_close is not None:
+                on_close()
+
+    response.streaming_content = wrapped()
+    return response
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_post_cards(request, head, tail, post_chunks):
+    yield head
+
+    template = get_template('blog/post_card.html').template
+    # 카드마다 context processor를 다시 실행하지 않도록 context를 하나만 만들어서 재사용
+    context = make_context({}, request)
+    with context.bind_template(template):
+        for chunk in post_chunks:
+            prefetch_related_objects(chunk, 'tags')
+            cards = []
+            for p in chunk:
+                with context.push(p=p):
+                    cards.append(template.render(context))
+            yield ''.join(cards)
+
+    yield tail
@@ -0,0 +1,45 @@
+from django.utils.text import slugify
+from .models import Tag
+
+
+def parse_tags(tags_str):
+    # ',', ';' 구분자를 모두 허용. 양쪽 공백을 없애고, 빈 값과 중복된 이름은 뺌.
+    names = []
+    for name in (tags_str or '').replace(',', ';').split(';'):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def resolve_tags(names):
+    # 이미 있는 태그는 한 번에 가져오고, 없는 태그는 slug를 붙여서 한 번에 만듦.
+    if not names:
+        return []
+
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = {name: slugify(name, allow_unicode=True) for name in names if name not in tags}
+    if missing:
+        # slug는 unique이므로 같은 slug의 태그가 이미 있거나 동시에 만들어지면 그 태그를 사용.
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slug) for name, slug in missing.items()],
+            ignore_conflicts=True
+        )
+        tags_by_slug = {tag.slug: tag for tag in Tag.objects.filter(slug__in=missing.values())}
+        for name, slug in missing.items():
+            tags[name] = tags_by_slug[slug]
+
+    return [tags[name] for name in names]
+
+
+def set_post_tags(post, tags_str):
+    # 바뀐 태그만 한 번의 add(), remove()로 반영.
+    new_tag_ids = {tag.pk for tag in resolve_tags(parse_tags(tags_str))}
+    current_tag_ids = set(post.tags.values_list('pk', flat=True))
+
+    removed = current_tag_ids - new_tag_ids
+    if removed:
+        post.tags.remove(*removed)
+    added = new_tag_ids - current_tag_ids
+    if added:
+        post.tags.add(*added)
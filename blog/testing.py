@@ -0,0 +1,33 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class QueryCountTestMixin:
+    # 포스트/댓글 수가 늘어나도 한 페이지를 만드는 쿼리 수가 그대로인지 확인하는 테스트용 도구.
+    # 템플릿에 {{ p.something.count }} 같은 코드가 들어가서 행마다 쿼리가 늘어나면 실패함.
+
+    def count_queries(self, request):
+        # request : self.client를 받아 응답을 돌려주는 함수. 캐시를 끈 상태에서 두 번째 요청의 쿼리 수를 셈.
+        with override_settings(BLOG_PAGE_CACHE_TIMEOUT=0):
+            request(self.client)
+            with CaptureQueriesContext(connection) as context:
+                response = request(self.client)
+        self.assertLess(response.status_code, 400)
+        return len(context.captured_queries), context.captured_queries
+
+    def assertQueryCountFlat(self, requests, grow):
+        # requests : {이름: 요청 함수}, grow : 데이터를 늘리는 함수
+        before = {name: self.count_queries(request) for name, request in requests.items()}
+        # 커밋된 뒤에 실행되는 캐시 무효화(blog/signals.py)도 실행
+        with self.captureOnCommitCallbacks(execute=True):
+            grow()
+        after = {name: self.count_queries(request) for name, request in requests.items()}
+
+        for name in requests:
+            count_before, _ = before[name]
+            count_after, queries = after[name]
+            self.assertEqual(
+                count_before, count_after,
+                f'{name}: 데이터가 늘어나자 쿼리 수가 {count_before} -> {count_after}로 바뀌었습니다.\n'
+                + '\n'.join(query['sql'] for query in queries)
+            )
@@ -1,10 +1,50 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.conf import settings
+from unittest import mock, skipIf
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from asgiref.sync import async_to_sync
 from bs4 import BeautifulSoup
 from django.contrib.auth.models import User
-from .models import Post, Category, Tag, Comment
+from allauth.socialaccount.models import SocialAccount
+from .models import Post, Category, Tag, Comment, ImportCheckpoint, ImportedPost
+from .context_processors import invalidate_sidebar, SIDEBAR_CACHE_KEY
+from .tags import parse_tags, set_post_tags
+from .search import search_posts, remove_post
+from .caching import get_generations, BLOG_GROUP
+from .testing import QueryCountTestMixin
+from . import metrics, async_views, views
+from single_pages import async_views as single_pages_async_views
+from single_pages import views as single_pages_views
+from do_it_django_prj.db_router import ReplicaRouter, ReplicaRoutingMiddleware, PIN_COOKIE_NAME
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from .querylog import log_queries, JsonFormatter
+from django.template import Template, Context as TemplateContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from .management.commands.explain_blog_queries import Command as ExplainBlogQueriesCommand
+from contextlib import contextmanager
+from datetime import datetime
+from io import StringIO
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
 
 class TestView(TestCase) :
     def setUp(self) :
+        # 캐시 무효화는 커밋된 뒤에 실행되는데(blog/signals.py) TestCase는 커밋하지 않으므로 테스트마다 캐시를 비움
+        cache.clear()
         self.client = Client()
         self.user_trump = User.objects.create_user(
             username='trump', password='somepassword'
@@ -77,6 +117,25 @@ class TestView(TestCase) :
 
 
 
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0, BLOG_POSTS_PER_PAGE=5)
+    def test_search_pagination(self):
+        # 개수와 페이지는 색인에서 COUNT(*)와 LIMIT/OFFSET으로 구하므로 결과 수에 상한이 없음
+        for i in range(12):
+            Post.objects.create(title=f'검색용 포스트 {i}', content='페이지', author=self.user_trump)
+
+        titles = []
+        for page in (1, 2, 3):
+            response = self.client.get(f'/blog/search/검색용/?page={page}')
+            main_area = BeautifulSoup(response.content, 'html.parser').find('div', id='main-area')
+            self.assertIn('Search: 검색용 (12)', main_area.text)
+            titles += [h2.text.strip() for h2 in main_area.find_all('h2', class_='card-title')]
+        self.assertEqual(sorted(titles), sorted(f'검색용 포스트 {i}' for i in range(12)))
+        self.assertEqual(self.client.get('/blog/search/검색용/?page=4').status_code, 404)
+
+        results = search_posts('검색용')
+        self.assertEqual(results.count(), 12)
+        self.assertEqual([p.pk for p in results[10:20]], [p.pk for p in list(results)[10:]])
+
     def test_delete_comment(self):
         comment_by_trump = Comment.objects.create(
             post=self.post_001,
@@ -429,7 +488,8 @@ class TestView(TestCase) :
         self.assertIn(self.user_obama.username.upper(), main_area.text)
 
         # 포스트가 없는 경우
-        Post.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.all().delete()
         self.assertEqual(Post.objects.count(), 0)
         response = self.client.get('/blog/')
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -470,3 +530,1004 @@ class TestView(TestCase) :
         self.assertIn(self.comment_001.author.username, comment_001_area.text)
         self.assertIn(self.comment_001.content, comment_001_area.text)
 
+
+
+    def test_content_html(self):
+        post = Post.objects.create(
+            title='마크다운 포스트',
+            content='# 제목\n\n**굵은 글씨**',
+            author=self.user_trump
+        )
+        self.assertIn('<h1>제목</h1>', post.content_html)
+        self.assertIn('<strong>굵은 글씨</strong>', post.content_excerpt)
+
+        post.content = '*수정된 내용*'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.get_content_markdown(), '<p><em>수정된 내용</em></p>')
+
+        # 저장된 HTML을 지운 뒤 관리 명령으로 다시 변환
+        Post.objects.update(content_html='', content_excerpt='')
+        remove_post(post.pk)
+        generation = get_generations([BLOG_GROUP])
+        out = StringIO()
+        call_command('render_post_content', stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p><em>수정된 내용</em></p>')
+        self.assertEqual(post.content_excerpt, '<p><em>수정된 내용</em></p>')
+        # 시그널 없이 저장하므로 캐시와 검색 색인은 명령이 직접 갱신
+        self.assertNotEqual(get_generations([BLOG_GROUP]), generation)
+        self.assertIn(post, search_posts('수정된'))
+
+        # 바뀐 HTML이 없으면 저장하지 않음
+        out = StringIO()
+        call_command('render_post_content', stdout=out)
+        self.assertIn('0 posts rendered', out.getvalue())
+
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_post_list_query_count(self):
+        urls = [
+            '/blog/',
+            self.category_programming.get_absolute_url(),
+            '/blog/category/no_category/',
+            self.tag_hello.get_absolute_url(),
+            '/blog/search/포스트/',
+        ]
+
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        before = {url: count_queries(url) for url in urls}
+
+        # 포스트와 카테고리가 늘어나도 쿼리 수는 그대로여야 함
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(10):
+                category = Category.objects.create(name=f'category {i}', slug=f'category-{i}')
+                for category_of_post in (self.category_programming, category, None):
+                    post = Post.objects.create(
+                        title=f'{i}번째 추가 포스트',
+                        content='추가 포스트입니다.',
+                        category=category_of_post,
+                        author=self.user_obama
+                    )
+                    post.tags.add(self.tag_hello, self.tag_python)
+
+        after = {url: count_queries(url) for url in urls}
+        self.assertEqual(before, after)
+
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_sidebar_cache(self):
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+            return len(context.captured_queries)
+
+        invalidate_sidebar()
+        cold = count_queries('/blog/')
+        warm = count_queries('/blog/')
+        # 캐시가 채워진 뒤에는 카테고리 목록, 미분류 개수 쿼리 2개가 빠짐
+        self.assertEqual(cold - warm, 2)
+
+        # 카테고리가 추가되면 커밋된 뒤 캐시가 지워져서 바로 반영됨
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='새 카테고리', slug='새-카테고리')
+        response = self.client.get('/blog/')
+        soup = BeautifulSoup(response.content, 'html.parser')
+        self.assertIn('새 카테고리 (0)', soup.find('div', id='categories-card').text)
+
+        # 트랜잭션 안에서는 커밋 전 데이터가 다시 캐시되지 않도록 커밋된 뒤에 지움
+        self.client.get('/blog/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='미분류 포스트', content='미분류', author=self.user_trump)
+            self.assertIsNotNone(cache.get(SIDEBAR_CACHE_KEY))
+        self.assertIsNone(cache.get(SIDEBAR_CACHE_KEY))
+        response = self.client.get('/blog/')
+        soup = BeautifulSoup(response.content, 'html.parser')
+        self.assertIn('미분류 (2)', soup.find('div', id='categories-card').text)
+
+
+    def test_search_index(self):
+        post_content = Post.objects.create(
+            title='장고 이야기',
+            hook_text='웹 프레임워크',
+            content='본문에만 **데이터베이스** 라는 단어가 있습니다.',
+            author=self.user_trump
+        )
+        post_title = Post.objects.create(
+            title='데이터베이스 색인',
+            content='색인에 대한 글',
+            author=self.user_trump
+        )
+
+        # 본문, hook_text도 검색되고 제목에 있는 포스트가 먼저 나옴
+        response = self.client.get('/blog/search/데이터베이스/')
+        soup = BeautifulSoup(response.content, 'html.parser')
+        main_area = soup.find('div', id='main-area')
+        self.assertIn('Search: 데이터베이스 (2)', main_area.text)
+        cards = main_area.find_all('div', class_='card')
+        self.assertEqual(cards[0].attrs['id'], f'post-{post_title.pk}')
+        self.assertEqual(cards[1].attrs['id'], f'post-{post_content.pk}')
+
+        response = self.client.get('/blog/search/프레임워크/')
+        self.assertIn(post_content.title, response.content.decode())
+
+        # 수정, 태그 변경, 삭제가 색인에 바로 반영됨
+        with self.captureOnCommitCallbacks(execute=True):
+            post_content.content = '다른 내용'
+            post_content.save()
+            post_title.tags.add(self.tag_python)
+        response = self.client.get('/blog/search/데이터베이스/')
+        self.assertNotIn(post_content.title, response.content.decode())
+        response = self.client.get('/blog/search/python/')
+        self.assertIn(post_title.title, response.content.decode())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post_title.delete()
+        response = self.client.get('/blog/search/색인/')
+        self.assertIn('Search: 색인 (0)', response.content.decode())
+
+        # 다시 만들다가 실패하면 비우기 전의 색인이 그대로 남음
+        with mock.patch('blog.management.commands.rebuild_search_index.rebuild_index', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command('rebuild_search_index', stdout=StringIO())
+        self.assertIn(post_content, search_posts('프레임워크'))
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertIn(post_content, search_posts('프레임워크'))
+
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_keyset_pagination(self):
+        for i in range(9):
+            Post.objects.create(
+                title=f'페이지 테스트 {i}',
+                content='페이지 테스트',
+                category=self.category_programming,
+                author=self.user_trump
+            )
+        all_pks = list(Post.objects.order_by('-pk').values_list('pk', flat=True))
+
+        def page_pks(soup):
+            return [int(card.attrs['id'].split('-')[1])
+                    for card in soup.find('div', id='main-area').find_all('div', class_='card')]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/blog/')
+        # 페이지를 나누거나 ETag를 만들려고 전체 포스트 수를 세지 않음(사이드바의 미분류 개수만 부분 색인으로 셈)
+        self.assertFalse([q for q in context.captured_queries
+                          if 'COUNT(' in q['sql'] and 'FROM "blog_post"' in q['sql'] and 'IS NULL' not in q['sql']])
+
+        # Older 링크를 따라가면 모든 포스트를 한 번씩 보게 됨
+        seen = []
+        url = '/blog/'
+        while url:
+            soup = BeautifulSoup(self.client.get(url).content, 'html.parser')
+            seen += page_pks(soup)
+            older = soup.find('a', text='← Older')
+            url = '/blog/' + older.attrs['href'] if older.attrs['href'] != '#' else None
+        self.assertEqual(seen, all_pks)
+
+        # Newer 링크로 돌아가기
+        soup = BeautifulSoup(self.client.get(f'/blog/?before={all_pks[4]}').content, 'html.parser')
+        self.assertEqual(page_pks(soup), all_pks[5:10])
+        newer = soup.find('a', text='Newer →').attrs['href']
+        soup = BeautifulSoup(self.client.get('/blog/' + newer).content, 'html.parser')
+        self.assertEqual(page_pks(soup), all_pks[:5])
+
+        # 더 오래된 포스트가 없으면 빈 페이지에서 Newer 링크로 돌아갈 수 있음
+        soup = BeautifulSoup(self.client.get(f'/blog/?before={all_pks[-1]}').content, 'html.parser')
+        self.assertEqual(page_pks(soup), [])
+        newer = soup.find('a', text='Newer →').attrs['href']
+        soup = BeautifulSoup(self.client.get('/blog/' + newer).content, 'html.parser')
+        self.assertEqual(page_pks(soup), all_pks[-5:])
+
+        # 예전 ?page= 주소
+        soup = BeautifulSoup(self.client.get('/blog/?page=2').content, 'html.parser')
+        self.assertEqual(page_pks(soup), all_pks[5:10])
+        self.assertEqual(self.client.get('/blog/?page=10').status_code, 404)
+
+        # 카테고리 페이지도 나눠서 보여줌
+        response = self.client.get(self.category_programming.get_absolute_url())
+        soup = BeautifulSoup(response.content, 'html.parser')
+        self.assertEqual(len(page_pks(soup)), 5)
+
+
+    @override_settings(BLOG_POSTS_PER_PAGE=2)
+    def test_tag_page_pagination(self):
+        for i in range(4):
+            post = Post.objects.create(
+                title=f'hello 태그 {i}',
+                content='태그 페이지',
+                author=self.user_trump
+            )
+            post.tags.add(self.tag_hello)
+
+        response = self.client.get(self.tag_hello.get_absolute_url())
+        soup = BeautifulSoup(response.content, 'html.parser')
+        main_area = soup.find('div', id='main-area')
+        self.assertEqual(len(main_area.find_all('div', class_='card')), 2)
+        self.assertIn('hello 태그 3', main_area.text)
+
+        older = soup.find('a', text='← Older').attrs['href']
+        response = self.client.get(self.tag_hello.get_absolute_url() + older)
+        main_area = BeautifulSoup(response.content, 'html.parser').find('div', id='main-area')
+        self.assertIn('hello 태그 1', main_area.text)
+        self.assertIn('hello 태그 0', main_area.text)
+
+        self.assertEqual(self.client.get('/blog/tag/no-such-tag/').status_code, 404)
+        self.assertEqual(self.client.get('/blog/category/no-such-category/').status_code, 404)
+
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_avatar_url(self):
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+            return len(context.captured_queries)
+
+        count_queries(self.post_001.get_absolute_url())
+        before = count_queries(self.post_001.get_absolute_url())
+        for i in range(5):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com')
+            Comment.objects.create(post=self.post_001, author=user, content=f'{i}번째 댓글')
+        # 댓글 작성자가 늘어도 아바타 주소를 구하는 쿼리는 한 번
+        self.assertEqual(count_queries(self.post_001.get_absolute_url()), before + 1)
+        self.assertEqual(count_queries(self.post_001.get_absolute_url()), before)
+
+        account = SocialAccount.objects.create(
+            user=self.user_obama, provider='google', uid='obama',
+            extra_data={'picture': 'https://example.com/obama.png'}
+        )
+        self.assertEqual(self.comment_001.get_avatar_url(), 'https://example.com/obama.png')
+        response = self.client.get('/')
+        self.assertIn('https://example.com/obama.png', response.content.decode())
+
+        account.delete()
+        self.assertIn('/svg/', self.comment_001.get_avatar_url())
+
+
+    def test_anonymous_page_cache(self):
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        urls = ['/', '/blog/', self.post_001.get_absolute_url(), self.category_programming.get_absolute_url()]
+        for url in urls:
+            count_queries(url)
+            # 두 번째 요청부터는 캐시된 페이지를 그대로 돌려줌(ETag를 계산하는 쿼리 하나만 실행)
+            self.assertLessEqual(count_queries(url), 1)
+
+        # 댓글이 바뀌면 그 포스트의 상세 페이지만 새로 만들어짐
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post_001, author=self.user_trump, content='캐시 테스트 댓글')
+        self.assertEqual(count_queries('/blog/'), 1)
+        response = self.client.get(self.post_001.get_absolute_url())
+        self.assertIn('캐시 테스트 댓글', response.content.decode())
+
+        # 포스트가 바뀌면 목록도 새로 만들어짐
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_002.title = '제목을 바꿨습니다.'
+            self.post_002.save()
+        self.assertIn('제목을 바꿨습니다.', self.client.get('/blog/').content.decode())
+        self.assertIn('제목을 바꿨습니다.', self.client.get('/').content.decode())
+
+        # 로그인한 사용자는 캐시를 사용하지 않음
+        self.client.login(username='obama', password='somepassword')
+        self.assertGreater(count_queries('/blog/'), 1)
+        response = self.client.get(self.post_001.get_absolute_url())
+        self.assertTrue(BeautifulSoup(response.content, 'html.parser').find('form', id='comment-form'))
+
+
+    def test_conditional_get(self):
+        response = self.client.get(self.post_001.get_absolute_url())
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(self.post_001.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.post_001.get_absolute_url(), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # 댓글이 바뀌면 새 페이지를 받음
+        Comment.objects.create(post=self.post_001, author=self.user_trump, content='새 댓글')
+        response = self.client.get(self.post_001.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/blog/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # 다른 페이지, 로그인한 사용자는 다른 ETag
+        self.assertEqual(self.client.get('/blog/?page=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.client.login(username='obama', password='somepassword')
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.client = Client()
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # 포스트가 삭제되어도 목록의 ETag가 바뀜
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_002.delete()
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # 태그 이름이 바뀌면 포스트의 updated_at은 그대로여도 목록과 상세 페이지의 ETag가 바뀜
+        etag = self.client.get('/blog/')['ETag']
+        detail_etag = self.client.get(self.post_003.get_absolute_url())['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag_python.name = 'Python 3'
+            self.tag_python.save()
+        response = self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Python 3', response.content.decode())
+        self.assertEqual(self.client.get(self.post_003.get_absolute_url(), HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+
+    def test_set_post_tags(self):
+        self.assertEqual(parse_tags(' python; ; 새 태그,python, 새 태그;'), ['python', '새 태그'])
+
+        tags_str = '; '.join(f'tag {i}' for i in range(30))
+        with CaptureQueriesContext(connection) as context:
+            set_post_tags(self.post_002, tags_str)
+        self.assertLessEqual(len(context.captured_queries), 10)
+        self.assertEqual(self.post_002.tags.count(), 30)
+        self.assertEqual(Tag.objects.get(name='tag 7').slug, 'tag-7')
+
+        # 바뀐 것이 없으면 태그를 다시 넣거나 지우지 않음
+        with CaptureQueriesContext(connection) as context:
+            set_post_tags(self.post_002, tags_str)
+        self.assertFalse([q for q in context.captured_queries
+                          if q['sql'].startswith(('INSERT', 'DELETE'))])
+
+        set_post_tags(self.post_002, 'tag 1; python;;')
+        self.assertEqual(
+            sorted(self.post_002.tags.values_list('name', flat=True)),
+            ['python', 'tag 1']
+        )
+        self.assertFalse(Tag.objects.filter(name='').exists())
+
+
+    def test_counters(self):
+        def refresh():
+            for obj in (self.category_programming, self.category_music, self.tag_hello,
+                        self.tag_python, self.post_001):
+                obj.refresh_from_db()
+
+        refresh()
+        self.assertEqual(self.category_programming.post_count, 1)
+        self.assertEqual(self.tag_python.post_count, 1)
+        self.assertEqual(self.post_001.comment_count, 1)
+
+        # 카테고리 변경, 태그 추가/삭제, 댓글 추가/삭제
+        self.post_002.category = self.category_programming
+        self.post_002.save()
+        self.post_002.tags.add(self.tag_python, self.tag_hello)
+        self.post_001.tags.clear()
+        comment = Comment.objects.create(post=self.post_001, author=self.user_trump, content='카운터')
+        refresh()
+        self.assertEqual(self.category_programming.post_count, 2)
+        self.assertEqual(self.category_music.post_count, 0)
+        self.assertEqual(self.tag_python.post_count, 2)
+        self.assertEqual(self.tag_hello.post_count, 1)
+        self.assertEqual(self.post_001.comment_count, 2)
+
+        # 예전에 읽어온 객체를 저장해도 카운터를 덮어쓰지 않음
+        stale_post = Post.objects.get(pk=self.post_001.pk)
+        comment.delete()
+        stale_post.title = '수정'
+        stale_post.save()
+        refresh()
+        self.assertEqual(self.post_001.comment_count, 1)
+
+        # pk를 None으로 바꿔 복사하면 새 행으로 저장되고, 카운터는 새 행 기준으로 다시 계산됨
+        post_copy = Post.objects.get(pk=self.post_001.pk)
+        post_copy.pk = None
+        post_copy.save()
+        self.assertNotEqual(post_copy.pk, self.post_001.pk)
+        self.assertEqual(Post.objects.get(pk=post_copy.pk).comment_count, 0)
+        refresh()
+        self.assertEqual(self.category_programming.post_count, 3)
+        tag_copy = Tag.objects.get(pk=self.tag_python.pk)
+        tag_copy.pk = None
+        tag_copy.slug = 'python-copy'
+        tag_copy.save()
+        self.assertEqual(Tag.objects.get(pk=tag_copy.pk).post_count, 0)
+        category_copy = Category.objects.get(pk=self.category_programming.pk)
+        category_copy.pk = None
+        category_copy.name, category_copy.slug = 'programming copy', 'programming-copy'
+        category_copy.save()
+        self.assertEqual(Category.objects.get(pk=category_copy.pk).post_count, 0)
+
+        # 지워진 행을 다시 저장해도 다시 추가됨
+        Tag.objects.filter(pk=tag_copy.pk).delete()
+        tag_copy.save()
+        self.assertTrue(Tag.objects.filter(pk=tag_copy.pk).exists())
+        post_copy.delete()
+        refresh()
+        self.assertEqual(self.category_programming.post_count, 2)
+
+        self.post_002.delete()
+        refresh()
+        self.assertEqual(self.category_programming.post_count, 1)
+        self.assertEqual(self.tag_python.post_count, 1)
+        self.assertEqual(self.tag_hello.post_count, 0)
+
+        # 관리 명령으로 다시 계산
+        Category.objects.update(post_count=100)
+        Tag.objects.update(post_count=100)
+        Post.objects.update(comment_count=100)
+        self.client.get('/blog/')
+        generation = get_generations([BLOG_GROUP])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('refresh_counters', stdout=StringIO())
+        refresh()
+        # 캐시된 사이드바와 페이지도 다시 만들어짐
+        self.assertIsNone(cache.get(SIDEBAR_CACHE_KEY))
+        self.assertNotEqual(get_generations([BLOG_GROUP]), generation)
+        self.assertEqual(self.category_programming.post_count, 1)
+        self.assertEqual(self.tag_python.post_count, 1)
+        self.assertEqual(self.post_001.comment_count, 1)
+
+
+    def test_explain_blog_queries(self):
+        out = StringIO()
+        call_command('explain_blog_queries', '--json', stdout=out)
+        report = json.loads(out.getvalue().rsplit('\n', 2)[0])
+        urls = {item['url'] for item in report}
+        self.assertIn('/blog/', urls)
+        self.assertIn(self.tag_python_kor.get_absolute_url(), urls)
+
+        # 미분류 포스트 수, 목록의 ETag는 색인으로 계산함
+        no_category_count = next(item for item in report
+                                 if 'COUNT(*)' in item['sql'] and 'IS NULL' in item['sql'])
+        self.assertFalse(no_category_count['scans'])
+        last_updated = next(item for item in report if 'MAX("blog_post"."updated_at")' in item['sql'])
+        self.assertFalse(last_updated['scans'])
+
+        # 조건 없는 집계는 색인만 읽더라도(SCAN ... USING COVERING INDEX) 전체를 읽으므로 scan으로 보고함
+        command = ExplainBlogQueriesCommand()
+        plan = command.explain('SELECT COUNT("blog_post"."id") FROM "blog_post"', [])
+        self.assertIn('COVERING INDEX', ' '.join(plan))
+        self.assertTrue([line for line in plan if command.is_sequential_scan(line)])
+
+
+    def test_benchmark_commands(self):
+        call_command('generate_blog_data', posts=30, categories=3, tags=10, users=3,
+                     batch_size=10, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 33)
+        post = Post.objects.last()
+        self.assertTrue(post.content_html)
+        self.assertEqual(post.comment_count, post.comment_set.count())
+        generated_category = Category.objects.exclude(
+            pk__in=[self.category_programming.pk, self.category_music.pk]).first()
+        self.assertEqual(generated_category.post_count, generated_category.post_set.count())
+
+        with tempfile.NamedTemporaryFile(suffix='.json') as f:
+            call_command('benchmark_views', iterations=2, warmup=0, json=f.name, stdout=StringIO())
+            result = json.load(f)
+        self.assertEqual(result['post_count'], 33)
+        for name in ('PostList', 'PostDetail', 'PostSearch', 'category_page', 'tag_page', 'landing'):
+            self.assertIn('p50_ms', result['views'][name])
+            self.assertGreater(result['views'][name]['queries_mean'], 0)
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_request_metrics(self):
+        metrics.registry.reset()
+
+        # Server-Timing은 스태프에게만 보냄
+        response = self.client.get(self.post_001.get_absolute_url())
+        self.assertNotIn('Server-Timing', response)
+        self.client.login(username='obama', password='somepassword')
+        response = self.client.get(self.post_001.get_absolute_url())
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('template;dur=', timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+        self.client.get('/blog/')
+        self.client.get('/blog/')
+        snapshot = metrics.registry.snapshot()
+        self.assertEqual(snapshot['blog/']['total']['count'], 2)
+        self.assertEqual(snapshot['blog/<int:pk>/']['total']['count'], 2)
+
+        # 통계는 스태프만 볼 수 있음
+        self.client.logout()
+        response = self.client.get('/blog/metrics/')
+        self.assertEqual(response.status_code, 403)
+        self.client.login(username='obama', password='somepassword')
+        response = self.client.get('/blog/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['blog/']['count'], 2)
+
+        # 워커별로 저장한 파일을 관리 명령에서 합쳐서 보여줌
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(REQUEST_METRICS_DIR=directory):
+                metrics.registry.dump(directory)
+                out = StringIO()
+                call_command('request_metrics', json=True, stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['blog/<int:pk>/']['count'], 2)
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_async_views(self):
+        # ASGI에서 사용하는 async 뷰가 sync 뷰와 같은 페이지를 만드는지 확인
+        factory = RequestFactory()
+        pages = [
+            (async_views.post_list, '/blog/', {}),
+            (async_views.post_detail, self.post_001.get_absolute_url(), {'pk': self.post_001.pk}),
+            (async_views.category_page, '/blog/category/programming/', {'slug': 'programming'}),
+            (async_views.category_page, '/blog/category/no_category/', {'slug': 'no_category'}),
+            (async_views.tag_page, '/blog/tag/python/', {'slug': 'python'}),
+            (async_views.post_search, '/blog/search/포스트/', {'q': '포스트'}),
+            (single_pages_async_views.landing, '/', {}),
+        ]
+        for view, url, kwargs in pages:
+            request = factory.get(url)
+            request.user = AnonymousUser()
+            response = async_to_sync(view)(request, **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                ' '.join(BeautifulSoup(response.content, 'html.parser').get_text().split()),
+                ' '.join(BeautifulSoup(self.client.get(url).content, 'html.parser').get_text().split()),
+            )
+
+        request = factory.get('/blog/tag/nothing/')
+        request.user = AnonymousUser()
+        with self.assertRaises(Http404):
+            async_to_sync(async_views.tag_page)(request, slug='nothing')
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_head_image_variants(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            image = BytesIO()
+            Image.new('RGB', (1200, 600), 'red').save(image, 'PNG')
+            post = Post.objects.create(
+                title='이미지가 있는 포스트',
+                content='그림',
+                author=self.user_obama,
+                head_image=SimpleUploadedFile('photo.png', image.getvalue(), content_type='image/png'),
+            )
+
+            # 원본보다 큰 크기는 만들지 않음
+            variants = post.head_image_variants
+            self.assertEqual([width for width, _ in variants['card']['webp']], [400, 800, 1200])
+            self.assertEqual([width for width, _ in variants['detail']['jpeg']], [900, 1200])
+            for files in list(variants['card'].values()) + list(variants['detail'].values()):
+                for width, path in files:
+                    self.assertTrue(os.path.exists(os.path.join(media_root, path)))
+            self.assertEqual(Post.objects.get(pk=post.pk).head_image_variants, variants)
+
+            # 목록 페이지 카드는 srcset과 WebP를 사용
+            soup = BeautifulSoup(self.client.get('/blog/').content, 'html.parser')
+            card = soup.find('div', id=f'post-{post.pk}')
+            self.assertEqual(card.find('source')['type'], 'image/webp')
+            self.assertIn('.card-800.webp 800w', card.find('source')['srcset'])
+            self.assertTrue(card.find('img')['src'].endswith('.card-800.jpg'))
+
+            soup = BeautifulSoup(self.client.get(post.get_absolute_url()).content, 'html.parser')
+            self.assertIn('.detail-900.jpg 900w', soup.find('img', class_='img-fluid')['srcset'])
+
+            # 이미 있는 포스트는 관리 명령으로 만듦
+            Post.objects.filter(pk=post.pk).update(head_image_variants={})
+            out = StringIO()
+            call_command('generate_image_variants', workers=2, stdout=out)
+            self.assertIn('1 posts processed (0 failed)', out.getvalue())
+            self.assertEqual(Post.objects.get(pk=post.pk).head_image_variants, variants)
+
+    def test_vendor_assets(self):
+        # 기본은 CDN, BLOG_VENDOR_ASSETS가 켜져 있고 받아둔 파일이 있으면 그 파일을 사용
+        vendor_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vendor_dir)
+        for url in ('/blog/', '/', '/about_me/'):
+            self.assertIn('cdn.jsdelivr.net/npm/bootstrap@4.6.2', self.client.get(url).content.decode())
+            # 파일을 받아두지 않았으면 CDN을 그대로 사용
+            with override_settings(BLOG_VENDOR_ASSETS=True, BLOG_VENDOR_DIR=vendor_dir, BLOG_PAGE_CACHE_TIMEOUT=0):
+                self.assertIn('cdn.jsdelivr.net/npm/bootstrap@4.6.2', self.client.get(url).content.decode())
+
+        vendor_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vendor_dir)
+        for path in ('vendor.bundle.js', 'fontawesome/css/all.min.css'):
+            os.makedirs(os.path.dirname(os.path.join(vendor_dir, path)), exist_ok=True)
+            open(os.path.join(vendor_dir, path), 'w').close()
+        for url in ('/blog/', '/', '/about_me/'):
+            with override_settings(BLOG_VENDOR_ASSETS=True, BLOG_VENDOR_DIR=vendor_dir, BLOG_PAGE_CACHE_TIMEOUT=0):
+                content = self.client.get(url).content.decode()
+            self.assertNotIn('cdn.jsdelivr.net', content)
+            self.assertNotIn('kit.fontawesome.com', content)
+            self.assertIn('/static/blog/vendor/vendor.bundle.js', content)
+            self.assertIn('/static/blog/vendor/fontawesome/css/all.min.css', content)
+
+    def test_compressed_manifest_storage(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(
+            STATIC_ROOT=static_root,
+            STATICFILES_STORAGE='do_it_django_prj.storage.CompressedManifestStaticFilesStorage',
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            manifest = json.load(open(os.path.join(static_root, 'staticfiles.json')))['paths']
+            hashed = manifest['blog/bootstrap/bootstrap.min.css']
+            self.assertRegex(hashed, r'^blog/bootstrap/bootstrap\.min\.[0-9a-f]{12}\.css$')
+            with open(os.path.join(static_root, hashed), 'rb') as f:
+                original = f.read()
+            with gzip.open(os.path.join(static_root, hashed + '.gz')) as f:
+                self.assertEqual(f.read(), original)
+            # 이미 압축된 이미지는 압축하지 않음
+            self.assertFalse(os.path.exists(os.path.join(static_root, manifest['single_pages/images/bird.jpg'] + '.gz')))
+
+    @skipIf(settings.BLOG_ASYNC_VIEWS, '스트리밍은 sync 뷰에서만 사용')
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0, BLOG_STREAM_CHUNK_SIZE=5)
+    def test_streaming_post_list(self):
+        for i in range(10):
+            post = Post.objects.create(title=f'포스트 {i}', content='내용', author=self.user_obama)
+            post.tags.add(self.tag_python)
+
+        # 페이지를 나눌 때 보이는 카드(전체가 한 페이지에 들어가도록)와 스트리밍한 카드가 같아야 함
+        with override_settings(BLOG_POSTS_PER_PAGE=100):
+            expected = BeautifulSoup(self.client.get('/blog/').content, 'html.parser')
+
+        metrics.registry.reset()
+        with override_settings(BLOG_POSTS_PER_PAGE=0):
+            with CaptureQueriesContext(connection) as request_queries:
+                response = self.client.get('/blog/')
+            self.assertTrue(response.streaming)
+            with CaptureQueriesContext(connection) as queries:
+                chunks = [chunk.decode() for chunk in response.streaming_content]
+                response.close()
+        # 머리 부분, 카드 5개씩 3묶음(13개), 꼬리 부분
+        self.assertEqual(len(chunks), 5)
+        self.assertIn('<h1>Blog', chunks[0])
+        self.assertNotIn('card mb-4', chunks[0])
+        self.assertIn('id="categories-card"', chunks[-1])
+        # 포스트는 exists() 없이 쿼리 한 번으로 조금씩 읽고(첫 묶음은 응답을 만들 때), 태그는 묶음마다 한 번
+        self.assertFalse([q for q in request_queries if 'LIMIT 1' in q['sql']])
+        self.assertEqual(len([q for q in request_queries if 'FROM "blog_post"' in q['sql']
+                              and 'COUNT' not in q['sql'] and 'MAX(' not in q['sql']]), 1)
+        self.assertEqual(len(queries), 3)
+        # 요청 통계에는 본문을 보내면서 실행한 쿼리도 들어감
+        self.assertEqual(
+            metrics.registry.snapshot()['blog/']['queries']['sum'], len(request_queries) + len(queries)
+        )
+
+        soup = BeautifulSoup(''.join(chunks), 'html.parser')
+        main_area = soup.find('div', id='main-area')
+        self.assertEqual(
+            [card.get_text().split() for card in main_area.find_all('div', class_='card mb-4')],
+            [card.get_text().split() for card in expected.find('div', id='main-area').find_all('div', class_='card mb-4')],
+        )
+        self.assertIsNone(main_area.find('nav', attrs={'aria-label': 'Pagination'}))
+
+        # 카테고리, 태그, 검색 결과도 스트리밍
+        with override_settings(BLOG_POSTS_PER_PAGE=0):
+            for url in ('/blog/category/programming/', '/blog/tag/python/', '/blog/search/포스트/'):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertIn('card mb-4', b''.join(response.streaming_content).decode())
+            # 포스트가 없으면 스트리밍하지 않음
+            response = self.client.get('/blog/search/없는말/')
+            self.assertFalse(response.streaming)
+            self.assertIn('아직 게시물이 없습니다.', response.content.decode())
+
+        # 쿼리 기록(BLOG_QUERY_LOG)에도 본문을 보내면서 실행한 쿼리가 들어감 (묶음마다 같은 태그 쿼리)
+        with override_settings(BLOG_POSTS_PER_PAGE=0, BLOG_QUERY_LOG=1, BLOG_DUPLICATE_QUERY_THRESHOLD=2):
+            response = Client().get('/blog/')
+            with self.assertLogs('blog.queries', 'WARNING') as logs:
+                b''.join(response.streaming_content)
+                response.close()
+        self.assertIn('blog_post_tags', logs.records[0].query['sql'])
+
+    def test_export_import(self):
+        self.post_001.created_at = datetime(2020, 1, 2, 3, 4, 5)
+        Post.objects.filter(pk=self.post_001.pk).update(created_at=self.post_001.created_at)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'blog.jsonl.gz')
+            call_command('export_blog', path, stdout=StringIO())
+            with gzip.open(path, 'rt') as f:
+                lines = f.read().splitlines()
+            self.assertEqual([json.loads(line)['type'] for line in lines],
+                             ['category'] * 2 + ['tag'] * 3 + ['user'] * 2 + ['post'] * 3 + ['comment'])
+
+            Post.objects.all().delete()
+            Category.objects.all().delete()
+            Tag.objects.all().delete()
+
+            # 댓글 줄이 깨져 있으면 그 앞에서 멈춤 (2개씩 저장하므로 마지막 포스트는 아직 저장 전)
+            with gzip.open(path, 'wt') as f:
+                f.write('\n'.join(lines[:-1] + ['{broken']) + '\n')
+            with self.assertRaises(CommandError):
+                call_command('import_blog', path, batch_size=2, stdout=StringIO())
+            self.assertEqual(Post.objects.count(), 2)
+            # 진행 상황은 저장된 묶음과 같은 트랜잭션에 기록됨
+            checkpoint = ImportCheckpoint.objects.get(source=path)
+            self.assertEqual(checkpoint.line, 9)
+            self.assertEqual(checkpoint.importedpost_set.count(), 2)
+
+            # 고친 파일로 다시 실행하면 이어서 가져옴
+            with gzip.open(path, 'wt') as f:
+                f.write('\n'.join(lines) + '\n')
+            out = StringIO()
+            call_command('import_blog', path, batch_size=2, stdout=out)
+            self.assertIn('resuming after line 9', out.getvalue())
+            self.assertFalse(ImportCheckpoint.objects.exists())
+            self.assertFalse(ImportedPost.objects.exists())
+
+        self.assertEqual(Post.objects.count(), 3)
+        post_001 = Post.objects.get(title=self.post_001.title)
+        self.assertEqual(post_001.created_at, datetime(2020, 1, 2, 3, 4, 5))
+        self.assertEqual(post_001.author, self.user_trump)
+        self.assertEqual(post_001.category.slug, 'programming')
+        self.assertEqual(post_001.content_html, self.post_001.content_html)
+        self.assertEqual([tag.slug for tag in post_001.tags.all()], ['hello'])
+        self.assertEqual(post_001.comment_count, 1)
+        self.assertEqual(post_001.comment_set.get().content, self.comment_001.content)
+        self.assertEqual(Category.objects.get(slug='programming').post_count, 1)
+        self.assertEqual(Tag.objects.get(slug='python').post_count, 1)
+        # 검색 색인도 다시 만들어짐
+        response = self.client.get('/blog/search/하하하하히히히히히/')
+        self.assertIn(self.post_001.title, response.content.decode())
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0, BLOG_COMMENTS_PER_PAGE=2)
+    def test_comment_pagination(self):
+        comments = [self.comment_001] + [
+            Comment.objects.create(post=self.post_001, author=self.user_trump, content=f'댓글 {i}')
+            for i in range(4)
+        ]
+
+        # 상세 페이지에는 최신 댓글 2개만 작성 순서대로 보임
+        response = self.client.get(self.post_001.get_absolute_url())
+        soup = BeautifulSoup(response.content, 'html.parser')
+        comment_list = soup.find('div', id='comment-list')
+        shown = [div['id'] for div in comment_list.find_all('div', id=lambda i: i and i.startswith('comment-'))
+                 if div['id'][len('comment-'):].isdigit()]
+        self.assertEqual(shown, [f'comment-{c.pk}' for c in comments[3:]])
+        load_older = comment_list.find('a', id='load-older-comments')
+        self.assertEqual(load_older['href'], f'/blog/{self.post_001.pk}/comments/?before={comments[3].pk}')
+
+        # async 뷰도 같은 댓글을 보여줌
+        request = RequestFactory().get(self.post_001.get_absolute_url())
+        request.user = AnonymousUser()
+        async_response = async_to_sync(async_views.post_detail)(request, pk=self.post_001.pk)
+        async_list = BeautifulSoup(async_response.content, 'html.parser').find('div', id='comment-list')
+        self.assertEqual(async_list.find('a', id='load-older-comments')['href'], load_older['href'])
+
+        # 버튼이 불러가는 조각 : 그 앞의 2개와 다음 버튼
+        response = self.client.get(load_older['href'])
+        self.assertEqual(response.status_code, 200)
+        soup = BeautifulSoup(response.content, 'html.parser')
+        self.assertFalse(soup.find('nav'))
+        self.assertTrue(soup.find('div', id=f'comment-{comments[1].pk}'))
+        self.assertTrue(soup.find('div', id=f'comment-{comments[2].pk}'))
+        self.assertFalse(soup.find('div', id=f'comment-{comments[3].pk}'))
+        load_older = soup.find('a', id='load-older-comments')
+        self.assertEqual(load_older['href'], f'/blog/{self.post_001.pk}/comments/?before={comments[1].pk}')
+
+        # 마지막 조각에는 버튼이 없음
+        response = self.client.get(load_older['href'])
+        soup = BeautifulSoup(response.content, 'html.parser')
+        self.assertTrue(soup.find('div', id=f'comment-{comments[0].pk}'))
+        self.assertFalse(soup.find('a', id='load-older-comments'))
+
+        # 작성자는 댓글과 함께 가져옴 (포스트 확인 + 댓글, 아바타 주소는 이미 캐시됨)
+        with self.assertNumQueries(2):
+            self.client.get(f'/blog/{self.post_001.pk}/comments/?before={comments[4].pk}')
+
+        self.assertEqual(self.client.get(f'/blog/{self.post_001.pk}/comments/').status_code, 404)
+        self.assertEqual(self.client.get(f'/blog/{self.post_001.pk}/comments/?before=x').status_code, 404)
+        self.assertEqual(self.client.get(f'/blog/9999/comments/?before=1').status_code, 404)
+
+    def test_query_log(self):
+        # 템플릿에서 포스트마다 작성자를 따로 가져오는 N+1을 일부러 만듦
+        template = Template('{% for p in posts %}\n{{ p.author.username }}{% endfor %}')
+        with self.assertLogs('blog.queries', 'WARNING') as logs:
+            with log_queries('test') as query_log:
+                query_log.slow_ms = float('inf')
+                template.render(TemplateContext({'posts': Post.objects.order_by('pk')}))
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0].query
+        self.assertEqual(record['event'], 'duplicate')
+        self.assertEqual(record['count'], 3)
+        self.assertIn('auth_user', record['sql'])
+        self.assertTrue(record['template'].endswith(':2'))
+        self.assertEqual(json.loads(JsonFormatter().format(logs.records[0]))['count'], 3)
+
+        # 미들웨어는 BLOG_QUERY_LOG가 켜져 있을 때만 동작
+        with override_settings(BLOG_QUERY_LOG=1, BLOG_SLOW_QUERY_MS=0, BLOG_PAGE_CACHE_TIMEOUT=0):
+            with self.assertLogs('blog.queries', 'WARNING') as logs:
+                Client().get(self.post_001.get_absolute_url())
+        record = logs.records[0].query
+        self.assertEqual(record['event'], 'slow')
+        self.assertIn(record['view'], ('blog.views.PostDetail', 'blog.async_views.post_detail'))
+
+
+class TestQueryCount(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        # 캐시 무효화는 커밋된 뒤에 실행되는데(blog/signals.py) TestCase는 커밋하지 않으므로 테스트마다 캐시를 비움
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create_user(username='obama', password='somepassword', is_staff=True)
+        self.category = Category.objects.create(name='programming', slug='programming')
+        self.tag = Tag.objects.create(name='python', slug='python')
+        self.post = self.create_posts(5)[-1]
+        self.client.login(username='obama', password='somepassword')
+
+    def create_posts(self, count):
+        # 포스트마다 카테고리, 태그 2개, 다른 사용자의 댓글을 붙임
+        posts = []
+        for i in range(count):
+            n = Post.objects.count()
+            category = self.category if i % 2 else Category.objects.create(name=f'category {n}', slug=f'category-{n}')
+            post = Post.objects.create(
+                title=f'포스트 {n}',
+                content=f'{n}번째 **포스트** 입니다.',
+                category=category,
+                author=self.author
+            )
+            post.tags.add(self.tag, Tag.objects.create(name=f'tag {n}', slug=f'tag-{n}'))
+            commenter = User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com')
+            Comment.objects.create(post=post, author=commenter, content='댓글입니다.')
+            posts.append(post)
+        return posts
+
+    def grow(self):
+        # 포스트 5개 -> 50개, 상세 페이지의 포스트 댓글 1개 -> 46개
+        for post in self.create_posts(45):
+            Comment.objects.create(post=self.post, author=post.comment_set.first().author, content='댓글')
+
+    def new_comment(self):
+        return Comment.objects.create(post=self.post, author=self.author, content='지울 댓글')
+
+    def test_blog_views(self):
+        self.assertQueryCountFlat({
+            'PostList': lambda client: client.get('/blog/'),
+            'PostList older': lambda client: client.get(f'/blog/?before={self.post.pk}'),
+            'PostSearch': lambda client: client.get('/blog/search/포스트/'),
+            'PostDetail': lambda client: client.get(self.post.get_absolute_url()),
+            'CategoryPostList': lambda client: client.get(self.category.get_absolute_url()),
+            'no_category': lambda client: client.get('/blog/category/no_category/'),
+            'TagPostList': lambda client: client.get(self.tag.get_absolute_url()),
+            'PostCreate': lambda client: client.get('/blog/create_post/'),
+            'PostUpdate': lambda client: client.get(f'/blog/update_post/{self.post.pk}/'),
+            'CommentUpdate': lambda client: client.get(f'/blog/update_comment/{self.new_comment().pk}/'),
+            'comment_list': lambda client: client.get(f'/blog/{self.post.pk}/comments/?before={2 ** 31}'),
+            'new_comment': lambda client: client.post(f'/blog/{self.post.pk}/new_comment/', {'content': '새 댓글'}),
+            'delete_comment': lambda client: client.get(f'/blog/delete_comment/{self.new_comment().pk}/'),
+        }, self.grow)
+
+    def test_blog_views_anonymous(self):
+        self.client.logout()
+        self.assertQueryCountFlat({
+            'PostList': lambda client: client.get('/blog/'),
+            'PostDetail': lambda client: client.get(self.post.get_absolute_url()),
+            'TagPostList': lambda client: client.get(self.tag.get_absolute_url()),
+        }, self.grow)
+
+
+class TestCacheInvalidation(TransactionTestCase):
+    def test_sidebar_invalidated_after_counters(self):
+        # 트랜잭션 밖(autocommit)에서도 카테고리의 포스트 수를 갱신한 뒤에 사이드바 캐시를 지움
+        category = Category.objects.create(name='programming', slug='programming')
+        post_counts = []
+
+        def invalidate():
+            post_counts.append(Category.objects.get(pk=category.pk).post_count)
+
+        with mock.patch('blog.signals.invalidate_sidebar', invalidate):
+            Post.objects.create(title='포스트', content='내용', category=category)
+        self.assertEqual(post_counts, [1])
+
+
+# TestCase는 테스트를 트랜잭션 안에서 실행하므로 라우터가 항상 primary를 고름 -> 트랜잭션 없이 확인
+@override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_REPLICA_PIN_SECONDS=5)
+class TestReplicaRouter(TransactionTestCase):
+    # SQL_REPLICAS를 주고 테스트하면 replica1은 default의 테스트 DB를 보는 연결(TEST MIRROR)
+    databases = '__all__'
+
+    @contextmanager
+    def replica_connection(self):
+        # 테스트 DB를 그대로 보는 replica1 연결 (SQL_REPLICAS를 주고 테스트할 때의 TEST MIRROR와 같음)
+        if 'replica1' in connections.settings:
+            yield connections['replica1']
+            return
+        connections.settings['replica1'] = dict(connection.settings_dict)
+        try:
+            yield connections['replica1']
+        finally:
+            connections['replica1'].close()
+            del connections['replica1']
+            del connections.settings['replica1']
+
+    def test_replica_queries(self):
+        author = User.objects.create_user(username='trump', password='somepassword')
+        for number in range(3):
+            Post.objects.create(title=f'포스트 {number}', content='복제 DB에서 읽는 포스트', author=author)
+        invalidate_sidebar()
+
+        with self.replica_connection() as replica:
+            # 검색 색인도 복제 DB에서 읽음
+            with CaptureQueriesContext(connection) as primary_queries, CaptureQueriesContext(replica) as replica_queries:
+                response = self.client.get('/blog/search/포스트/')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('포스트 2', response.content.decode())
+            self.assertTrue(any('blog_post_search' in query['sql'] for query in replica_queries))
+            self.assertEqual(primary_queries.captured_queries, [])
+
+            if settings.BLOG_ASYNC_VIEWS:
+                return
+            # 스트리밍 목록은 미들웨어가 끝난 뒤 본문을 보내면서 읽는 쿼리도 복제 DB로
+            with override_settings(BLOG_POSTS_PER_PAGE=0, BLOG_STREAM_CHUNK_SIZE=2):
+                response = self.client.get('/blog/')
+                self.assertTrue(response.streaming)
+                with CaptureQueriesContext(connection) as primary_queries, CaptureQueriesContext(replica) as replica_queries:
+                    content = b''.join(response.streaming_content).decode()
+                    response.close()
+            self.assertIn('포스트 0', content)
+            self.assertTrue(any('blog_post_tags' in query['sql'] for query in replica_queries))
+            self.assertEqual(primary_queries.captured_queries, [])
+
+    def test_replica_router(self):
+        router = ReplicaRouter()
+        factory = RequestFactory()
+
+        def route(request, view, write=False, atomic=False):
+            # 뷰 대신 라우터가 고르는 DB를 기록 : [포스트 읽기, 세션 읽기, (쓰기 후) 포스트 읽기]
+            routed = []
+
+            def get_response(request):
+                middleware.process_view(request, view, (), {})
+                routed.append(router.db_for_read(Post))
+                routed.append(router.db_for_read(Session))
+                if atomic:
+                    with transaction.atomic():
+                        routed.append(router.db_for_read(Post))
+                if write:
+                    self.assertEqual(router.db_for_write(Comment), 'default')
+                routed.append(router.db_for_read(Post))
+                return HttpResponse()
+
+            middleware = ReplicaRoutingMiddleware(get_response)
+            return middleware(request), routed
+
+        post_list = views.PostList.as_view()
+        response, routed = route(factory.get('/blog/'), post_list)
+        self.assertEqual(routed, ['replica1', None, 'replica1'])
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+        # 스트리밍 응답은 미들웨어가 끝난 뒤 본문을 만들므로, 그때 실행하는 쿼리도 같은 복제 DB로
+        def streaming_response(request):
+            middleware.process_view(request, post_list, (), {})
+            return StreamingHttpResponse(router.db_for_read(Post) or 'default' for _ in range(2))
+
+        middleware = ReplicaRoutingMiddleware(streaming_response)
+        response = middleware(factory.get('/blog/'))
+        self.assertEqual(b''.join(response.streaming_content), b'replica1replica1')
+        self.assertIsNone(router.db_for_read(Post))
+
+        # 복제 DB를 쓰지 않는 경우 : 표시하지 않은 뷰, POST, 요청 안의 트랜잭션
+        self.assertEqual(route(factory.get('/blog/create_post/'), views.PostCreate.as_view())[1], [None, None, None])
+        self.assertEqual(route(factory.post('/blog/'), post_list)[1], [None, None, None])
+        self.assertEqual(route(factory.get('/blog/'), post_list, atomic=True)[1], ['replica1', None, None, 'replica1'])
+        with transaction.atomic():
+            self.assertEqual(route(factory.get('/blog/'), post_list)[1], [None, None, None])
+        self.assertIsNone(router.db_for_read(Post))
+
+        # async 뷰와 함수 뷰도 표시되어 있음
+        self.assertEqual(route(factory.get('/blog/1/'), async_views.post_detail)[1][0], 'replica1')
+        self.assertEqual(route(factory.get('/'), single_pages_views.landing)[1][0], 'replica1')
+
+        # 쓰기가 있으면 그 뒤의 읽기와 다음 요청들은 잠시 primary로
+        response, routed = route(factory.get('/blog/'), post_list, write=True)
+        self.assertEqual(routed, ['replica1', None, None])
+        cookie = response.cookies[PIN_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 5)
+        request = factory.get('/blog/')
+        request.COOKIES[PIN_COOKIE_NAME] = cookie.value
+        self.assertEqual(route(request, post_list)[1], [None, None, None])
+
+        request.COOKIES[PIN_COOKIE_NAME] = str(time.time() - 1)
+        self.assertEqual(route(request, post_list)[1], ['replica1', None, 'replica1'])
+
+        with override_settings(DATABASE_REPLICAS=[]):
+            response, routed = route(factory.get('/blog/'), post_list, write=True)
+            self.assertEqual(routed, [None, None, None])
+            self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
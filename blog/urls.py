@@ -1,15 +1,32 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# ASGI로 실행하면 읽기 전용 페이지는 async 뷰(blog/async_views.py)를 사용
+if settings.BLOG_ASYNC_VIEWS:
+    post_search = async_views.post_search
+    tag_page = async_views.tag_page
+    category_page = async_views.category_page
+    post_detail = async_views.post_detail
+    post_list = async_views.post_list
+else:
+    post_search = views.PostSearch.as_view()
+    tag_page = views.TagPostList.as_view()
+    category_page = views.CategoryPostList.as_view()
+    post_detail = views.PostDetail.as_view()
+    post_list = views.PostList.as_view()
 
 urlpatterns = [
-    path('search/<str:q>/', views.PostSearch.as_view()),
+    path('search/<str:q>/', post_search),
+    path('metrics/', views.request_metrics),
     path('delete_comment/<int:pk>/', views.delete_comment),
     path('update_comment/<int:pk>/', views.CommentUpdate.as_view()),
     path('update_post/<int:pk>/', views.PostUpdate.as_view()),
     path('create_post/', views.PostCreate.as_view()),
-    path('tag/<str:slug>/', views.tag_page),
-    path('category/<str:slug>/', views.category_page),
+    path('tag/<str:slug>/', tag_page),
+    path('category/<str:slug>/', category_page),
     path('<int:pk>/new_comment/', views.new_comment),
-    path('<int:pk>/', views.PostDetail.as_view()),
-    path('', views.PostList.as_view()),
+    path('<int:pk>/comments/', views.comment_list),
+    path('<int:pk>/', post_detail),
+    path('', post_list),
 ]
\ No newline at end of file
@@ -1,12 +1,21 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import redirect
+from django.conf import settings
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, render
 from .models import Post, Category, Tag, Comment
 from .forms import CommentForm
+from .search import search_posts
+from .tags import set_post_tags
+from .pagination import KeysetPaginator, NumberedPaginator, CommentPaginator
+from .streaming import stream_post_list
+from .avatars import prime_avatar_urls
+from .caching import cache_anonymous_page, post_group, post_list_condition, post_detail_condition
+from django.utils.decorators import method_decorator
+from django.http import JsonResponse, Http404
+from . import metrics
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
-from django.utils.text import slugify
-from django.db.models import Q
+from do_it_django_prj.db_router import replica_reads
 
 
 
@@ -32,10 +41,8 @@ class PostUpdate(LoginRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super(PostUpdate, self).get_context_data()
-        if self.object.tags.exists():
-            tags_str_list = list()
-            for t in self.object.tags.all():
-                tags_str_list.append(t.name)
+        tags_str_list = [t.name for t in self.object.tags.all()]
+        if tags_str_list:
             context['tags_str_default'] = '; '.join(tags_str_list)
 
         return context
@@ -49,21 +56,8 @@ class PostUpdate(LoginRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         response = super(PostUpdate, self).form_valid(form)
-        self.object.tags.clear()
-
-        tags_str = self.request.POST.get('tags_str')
-        if tags_str:
-            tags_str = tags_str.strip()
-            tags_str = tags_str.replace(',', ';')
-            tags_list = tags_str.split(';')
-
-            for t in tags_list:
-                t = t.strip()
-                tag, is_tag_created = Tag.objects.get_or_create(name=t)
-                if is_tag_created:
-                    tag.slug = slugify(t, allow_unicode=True)
-                    tag.save()
-                self.object.tags.add(tag)
+        # 입력한 태그와 지금 태그를 비교해서 바뀐 것만 반영.
+        set_post_tags(self.object, self.request.POST.get('tags_str'))
 
         return response
 
@@ -84,120 +78,138 @@ class PostCreate(LoginRequiredMixin, UserPassesTestMixin, CreateView):
             # CreateView의 form_valid() 함수의 결괏값을 변수에 임시로 담아두기.
             response = super(PostCreate, self).form_valid(form)
 
-            # input의 값을 가져와라
-            tags_str = self.request.POST.get('tags_str')
-
-            # input이 빈칸인 경우 태그와 관련된 동작 필요x, 따라서 if 문으로 처리
-            if tags_str:
-                # strip() : 양쪽의 공백 제거
-                tags_str = tags_str.strip()
-                # ',', ';' 구분자로 처리하기 위해 tags_str로 받은 값의 쉼표(,)를 세미콜론(;)으로 변경해줌.
-                tags_str = tags_str.replace(',', ';')
-                # 변경한 후 세미콜론으로 split해서 리스트 형태로 tags_list에 담는다.
-                tags_list = tags_str.split(';')
-
-                for t in tags_list:
-                    # tags_list에 리스트 형태로 담겨 있는 값은 문자열 형태이므로 Tag 모델의 인스턴스로 변환하는 과정 필요.
-                    t = t.strip()
-                    # 이 값을 name으로 갖는 태그가 있다면 가져오고, 없다면 새로 만듦.
-                    # get_or_create()는 두 가지 값을 동시에 return. 첫 번째는 Tag 모델의 인스턴스,
-                    # 두 번째는 이 인스턴스가 새로 생성되었는지를 나타내는 bool 형태의 값
-                    tag, is_tag_created = Tag.objects.get_or_create(name=t)
-                    # 같은 name을 갖는 태그가 없어 새로 생성 했아면 slug 값은 없는 상태이므로 slug 값을 생성해줘야 함.
-                    # slugify()라는 함수를 사용해 slug 값 생성할 수 있도록
-                    if is_tag_created:
-                        tag.slug = slugify(t, allow_unicode=True)
-                        tag.save()
-                    # self.object : 이번에 새로 만든 포스트
-                    self.object.tags.add(tag)
+            # input의 값(예: 'new tag; 한글 태그, python')을 Tag 모델의 인스턴스로 바꿔서 포스트에 연결. (blog/tags.py)
+            # self.object : 이번에 새로 만든 포스트
+            set_post_tags(self.object, self.request.POST.get('tags_str'))
 
             return response
         else:
             return redirect('/blog/')
 
 
+@replica_reads
+@method_decorator(post_list_condition, name='dispatch')
+@method_decorator(cache_anonymous_page(), name='dispatch')
 class PostList(ListView):
     model = Post
     ordering = '-pk'
-    # 한페이지에 5개만 보여주겠다.
+    # 한페이지에 5개만 보여주겠다. (settings.BLOG_POSTS_PER_PAGE 로 변경 가능)
     paginate_by = 5
 
-    # **kwargs : 딕셔너리 형태로 처리.
-    def get_context_data(self, **kwargs):
-        context = super(PostList, self).get_context_data()
-        context['categories'] = Category.objects.all()
-        context['no_category_post_count'] = Post.objects.filter(category=None).count()
-        return context
+    # pk 기준 keyset 페이지네이션(blog/pagination.py). False면 Django의 Paginator를 사용.
+    keyset_pagination = True
+    paginator_class = NumberedPaginator
+
+    def get_queryset(self):
+        return super(PostList, self).get_queryset().with_relations()
+
+    def get_paginate_by(self, queryset):
+        return getattr(settings, 'BLOG_POSTS_PER_PAGE', self.paginate_by)
+
+    def render_to_response(self, context, **response_kwargs):
+        # 페이지를 나누지 않으면(BLOG_POSTS_PER_PAGE = 0) 포스트 카드를 조금씩 읽으면서 보냄 (blog/streaming.py)
+        if context['page_obj'] is None:
+            response = stream_post_list(self.request, self.get_template_names(), context, self.object_list)
+            if response is not None:
+                return response
+            # 포스트가 없으면 템플릿이 빈 목록을 다시 조회하지 않도록 비워서 보통 페이지로 보여줌
+            context['object_list'] = context['post_list'] = []
+        return super(PostList, self).render_to_response(context, **response_kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_pagination:
+            return super(PostList, self).paginate_queryset(queryset, page_size)
+        page = KeysetPaginator(queryset, page_size).page(self.request.GET)
+        return None, page, page.object_list, page.has_other_pages()
 
 
 class PostSearch(PostList):
-    paginate_by = None
+    # 검색 결과도 PostList처럼 5개씩 페이지로 나눔. 관련도 순이므로 페이지 번호 방식을 사용.
+    keyset_pagination = False
 
     def get_queryset(self):
         q = self.kwargs['q']
-        post_list = Post.objects.filter(
-            Q(title__contains=q) | Q(tags__name__contains=q)
-            # distinct() 중복 검색되는 것을 방지하기 위한
-        ).distinct()
+        # 제목, 요약문, 본문, 태그 이름에 대한 전문 검색 색인(blog/search.py)을 사용하고, 관련도 순으로 정렬.
+        post_list = search_posts(q).with_relations()
         return post_list
 
     def get_context_data(self, **kwargs):
         context = super(PostSearch, self).get_context_data()
         q = self.kwargs['q']
-        context['search_info'] = f'Search: {q} ({self.get_queryset().count()})'
+        # get_queryset()을 다시 호출하지 않고 paginator가 이미 센 개수를 사용.
+        # 페이지를 나누지 않을 때(스트리밍)는 카드보다 먼저 보내는 제목에 필요하므로 검색 색인에서만 셈 (blog/search.py)
+        count = context['paginator'].count if context['paginator'] else self.object_list.count()
+        context['search_info'] = f'Search: {q} ({count})'
 
         return context
 
 
 
+@replica_reads
+@method_decorator(post_detail_condition, name='dispatch')
+@method_decorator(cache_anonymous_page(lambda pk: [post_group(pk)]), name='dispatch')
 class PostDetail(DetailView):
     model = Post
 
+    def get_queryset(self):
+        return Post.objects.with_relations()
+
     def get_context_data(self, **kwargs):
         # context에 get_context_data()에서 기존에 제공했던 기능 그대로를 저장.
         context = super(PostDetail, self).get_context_data()
-        # 모든 카테고리를 가져와서 'categories'라는 키에 저장.
-        context['categories'] = Category.objects.all()
-        # Post.objects.filter(category=None).count() : 카테고리가 지정되지 않은 포스트의 개수를 세라는 의미의 쿼리셋
-        # 을 'no_category_post_count'라는 키에 저장.
-        context['no_category_post_count'] = Post.objects.filter(category=None).count()
+        # 사이드바의 카테고리 목록과 미분류 포스트 개수는 blog.context_processors.sidebar 에서 제공.
         context['comment_form'] = CommentForm
+        # 최신 댓글 BLOG_COMMENTS_PER_PAGE개만 보여주고, 나머지는 comment_list로 조금씩 가져옴.
+        context['comments'] = get_comment_page(self.object.pk)
         return context
 
 
-def category_page(request, slug):
-    if slug == 'no_category':
-        category = '미분류'
-        post_list = Post.objects.filter(category=None)
-    else:
-        category = Category.objects.get(slug=slug)
-        post_list = Post.objects.filter(category=category)
-
-    return render(
-        request,
-        'blog/post_list.html',
-        {
-            'post_list': post_list,
-            'categories': Category.objects.all(),
-            'no_category_post_count': Post.objects.filter(category=None).count(),
-            'category': category,
-        }
-    )
-
-def tag_page(request, slug):
-    tag = Tag.objects.get(slug=slug)
-    post_list = tag.post_set.all()
-
-    return render(
-        request,
-        'blog/post_list.html',
-        {
-            'post_list': post_list,
-            'tag': tag,
-            'categories': Category.objects.all(),
-            'no_category_post_count': Post.objects.filter(category=None).count(),
-        }
-    )
+def get_comment_page(post_id, before=None):
+    # 댓글과 작성자를 한 번에 가져오고, 작성자들의 아바타 주소도 한꺼번에 준비.
+    paginator = CommentPaginator(post_id, Comment.objects.select_related('author'), settings.BLOG_COMMENTS_PER_PAGE)
+    page = paginator.page(before)
+    prime_avatar_urls(comment.author for comment in page)
+    return page
+
+
+@replica_reads
+@cache_anonymous_page(lambda pk: [post_group(pk)])
+def comment_list(request, pk):
+    # 상세 페이지의 'Load older comments' 버튼이 불러가는 HTML 조각. (?before=<댓글 pk>)
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        raise Http404('잘못된 페이지입니다.')
+    get_object_or_404(Post.objects.only('pk'), pk=pk)
+    return render(request, 'blog/comment_page.html', {'comments': get_comment_page(pk, before)})
+
+
+class CategoryPostList(PostList):
+    def get_queryset(self):
+        slug = self.kwargs['slug']
+        if slug == 'no_category':
+            self.category = '미분류'
+            post_list = Post.objects.filter(category=None)
+        else:
+            self.category = get_object_or_404(Category, slug=slug)
+            post_list = Post.objects.filter(category=self.category)
+        return post_list.with_relations().order_by('-pk')
+
+    def get_context_data(self, **kwargs):
+        context = super(CategoryPostList, self).get_context_data()
+        context['category'] = self.category
+        return context
+
+
+class TagPostList(PostList):
+    def get_queryset(self):
+        self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
+        return self.tag.post_set.with_relations().order_by('-pk')
+
+    def get_context_data(self, **kwargs):
+        context = super(TagPostList, self).get_context_data()
+        context['tag'] = self.tag
+        return context
 
 def new_comment(request, pk):
     if request.user.is_authenticated:
@@ -227,3 +239,10 @@ def delete_comment(request, pk):
     else:
         raise PermissionDenied
 
+
+def request_metrics(request):
+    # 이 워커 프로세스가 모은 URL 패턴별 요청 시간 통계(blog/metrics.py). 스태프만 볼 수 있음.
+    if request.user.is_authenticated and request.user.is_staff:
+        return JsonResponse(metrics.summarize(metrics.merge_snapshots([metrics.registry.snapshot()])))
+    else:
+        raise PermissionDenied
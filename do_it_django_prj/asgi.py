@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'do_it_django_prj.settings')
+# settings에서 ASGI 전용 설정(SQL_PGBOUNCER일 때 연결 재사용 끄기, async 뷰)을 고를 때 사용
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
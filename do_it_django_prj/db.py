@@ -0,0 +1,20 @@
+import django
+from django.core.signals import request_started
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    # 재사용하는 연결(CONN_MAX_AGE)이 DB 재시작, 방화벽 타임아웃 등으로 끊겨 있으면
+    # 요청 중간에 오류가 나지 않도록 요청을 시작할 때 닫아서 새로 연결하게 함
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+# Django 4.1부터는 CONN_HEALTH_CHECKS 설정을 Django가 직접 처리함
+if django.VERSION < (4, 1):
+    request_started.connect(close_unusable_connections, dispatch_uid='close_unusable_connections')
@@ -0,0 +1,135 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from blog.streaming import wrap_streaming_content
+
+# 읽기 전용 복제 DB(settings.DATABASE_REPLICAS)로 읽기 쿼리를 보내는 라우터.
+# @replica_reads를 붙인 뷰(목록, 상세, 검색, 카테고리, 태그, landing)의 GET/HEAD 요청에서만 복제 DB를 읽고,
+# 그 밖의 요청, 쓰기, 트랜잭션 안의 읽기는 모두 default(primary)를 사용.
+# 복제 지연 때문에 방금 쓴 내용이 안 보이지 않도록, 쓰기가 있었던 요청 뒤에는
+# DATABASE_REPLICA_PIN_SECONDS초 동안 그 브라우저의 요청을 primary로 보냄(쿠키).
+
+PIN_COOKIE_NAME = 'db_primary_until'
+
+# 요청마다 ReplicaState를 하나 만들어 담음. 요청 밖(관리 명령, 셸 등)에서는 None -> 항상 primary.
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    def __init__(self):
+        self.alias = None
+        self.wrote = False
+
+
+@contextmanager
+def use_state(state):
+    token = _state.set(state)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def reading_from_replica():
+    state = _state.get()
+    return state is not None and state.alias is not None and not state.wrote
+
+
+def replica_reads(view):
+    # 복제 DB에서 읽어도 되는 뷰에 붙임. 함수 뷰와 클래스 뷰(as_view()가 만든 함수의 view_class) 모두 지원.
+    view.replica_reads = True
+    return view
+
+
+def is_replica_view(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'replica_reads', False) or getattr(view_class, 'replica_reads', False)
+
+
+class ReplicaRouter:
+    # 세션은 로그인 직후 바로 읽어야 하므로 항상 primary에서 읽음
+    primary_apps = {'sessions'}
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.alias is None or state.wrote:
+            return None
+        if model._meta.app_label in self.primary_apps:
+            return None
+        # 트랜잭션 안에서는 트랜잭션 안의 데이터를 읽어야 함 (ATOMIC_REQUESTS, 테스트의 TestCase 등)
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # 이 요청의 이후 읽기와 다음 요청들은 primary로
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 복제 DB는 primary와 같은 데이터이므로 어느 DB에서 읽은 객체끼리도 연결 가능
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 복제 DB의 스키마는 primary에서 복제됨 (로컬 SQLite는 sync_sqlite_replicas 명령으로 복사)
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = ReplicaState()
+        with use_state(state):
+            response = self.get_response(request)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        # async 뷰가 run_sync로 다른 스레드에서 실행하는 쿼리도 복사된 context에서 같은 state를 봄
+        state = ReplicaState()
+        with use_state(state):
+            response = await self.get_response(request)
+        return self.finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or request.method not in ('GET', 'HEAD') or not is_replica_view(view_func):
+            return None
+        if self.is_pinned(request):
+            return None
+        # 한 요청의 쿼리는 모두 같은 복제 DB에서 읽음
+        _state.get().alias = random.choice(replicas)
+        return None
+
+    def is_pinned(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE_NAME, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def finish(self, response, state):
+        if response.streaming:
+            # 본문을 보내면서 실행하는 쿼리(blog/streaming.py)도 이 요청의 state로 라우팅.
+            # 본문을 보내는 중에 쓰기가 있으면 헤더가 이미 나갔으므로 primary 고정 쿠키는 붙이지 못함.
+            wrap_streaming_content(response, lambda: use_state(state))
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state.wrote and getattr(settings, 'DATABASE_REPLICAS', []):
+            seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE_NAME, f'{time.time() + seconds:.3f}', max_age=seconds, httponly=True, samesite='Lax')
+        return response
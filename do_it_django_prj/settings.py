@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/4.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
+import copy
 import os
 from pathlib import Path
 
@@ -58,6 +59,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.RequestMetricsMiddleware',
+    'blog.middleware.QueryLogMiddleware',
+    'do_it_django_prj.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,7 +75,8 @@ ROOT_URLCONF = 'do_it_django_prj.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates + 요청별 템플릿 렌더링 시간 측정 (blog/metrics.py)
+        'BACKEND': 'blog.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,6 +85,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'blog.context_processors.sidebar',
+                'blog.context_processors.vendor_assets',
             ],
         },
     },
@@ -101,9 +108,67 @@ DATABASES = {
         'PASSWORD': os.environ.get('SQL_PASSWORD', 'password'),
         'HOST': os.environ.get('SQL_HOST', 'localhost'),
         'PORT': os.environ.get("SQL_PORT", '5432'),
+        # 연결을 요청마다 새로 열지 않고 SQL_CONN_MAX_AGE초 동안 재사용(0이면 요청마다 새로 연결)
+        'CONN_MAX_AGE': int(os.environ.get('SQL_CONN_MAX_AGE', 60)),
+        # 재사용하기 전에 연결이 살아 있는지 확인. Django 4.1부터는 Django가 직접 하고,
+        # 그 이전 버전에서는 do_it_django_prj/db.py가 요청 시작 때 확인함
+        'CONN_HEALTH_CHECKS': bool(int(os.environ.get('SQL_CONN_HEALTH_CHECKS', 1))),
     }
 }
 
+# SQL_PGBOUNCER=1 : SQL_HOST/SQL_PORT가 PostgreSQL 대신 pgbouncer(트랜잭션 풀링)를 가리킬 때 쓰는 설정. 기본은 꺼져 있음.
+# 실제 DB 연결은 pgbouncer가 모아서 재사용하고(docker-compose.pgbouncer.yml), Django 쪽에서는
+# 트랜잭션마다 다른 DB 연결이 붙을 수 있으므로 서버 측 커서(iterator())를 끔.
+# 주의 : 서버 측 커서를 끄면 psycopg2는 .iterator(chunk_size=...)의 결과 전체를 한 번에 받아서 메모리에 올림.
+# 페이지를 나누지 않는 스트리밍 목록(BLOG_POSTS_PER_PAGE = 0, blog/streaming.py)과 export_blog가 포스트 수만큼
+# 메모리를 쓰게 되므로, 이 기능들을 쓰거나 포스트가 많으면 pgbouncer를 거치지 않는 쪽(기본 설정)을 사용.
+# ASGI(do_it_django_prj/asgi.py)에서는 요청이 여러 스레드에서 처리되어 스레드마다 연결이 남으므로
+# pgbouncer로의 연결도 요청마다 닫음. (같은 머신/네트워크의 pgbouncer에 연결하는 비용은 작음)
+if int(os.environ.get('SQL_PGBOUNCER', 0)):
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    if os.environ.get('DJANGO_ASGI'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# 읽기 전용 복제 DB (do_it_django_prj/db_router.py)
+# SQL_REPLICAS : 쉼표로 구분한 복제 DB 목록. SQLite는 파일 경로, 그 밖의 DB는 host 또는 host:port
+# (DB 이름, 사용자, 비밀번호, 연결 설정은 default와 같음). 예) SQL_REPLICAS=replica1.sqlite3,replica2.sqlite3
+# 로컬에서 SQLite 파일로 시험할 때는 `python manage.py sync_sqlite_replicas`로 primary를 복사해서 복제를 흉내냄.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(filter(None, os.environ.get('SQL_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = copy.deepcopy(DATABASES['default'])
+    if DATABASES[alias]['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias]['NAME'] = os.path.join(BASE_DIR, replica.strip())
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES['default']['PORT']
+    # 테스트에서는 따로 테스트 DB를 만들지 않고 default의 테스트 DB를 그대로 사용
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['do_it_django_prj.db_router.ReplicaRouter']
+# 쓰기가 있었던 요청 뒤 이 시간(초) 동안은 그 브라우저의 읽기도 primary로 보냄 (복제 지연 대비)
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('SQL_REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# 기본은 프로세스별 메모리 캐시. gunicorn 워커가 여러 개일 때는 DJANGO_CACHE_DIR을 지정해서
+# 모든 워커가 같은 파일 캐시를 보도록 해야 캐시 무효화가 모든 워커에 반영됨.
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -143,6 +208,20 @@ USE_TZ = False
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, '_static')
 
+# DJANGO_STATIC_MANIFEST=1 이면 collectstatic이 파일 이름에 해시를 붙이고 .gz/.br 파일도 만듦
+# (do_it_django_prj/storage.py). 이때는 collectstatic을 먼저 실행해야 페이지가 열림.
+if int(os.environ.get('DJANGO_STATIC_MANIFEST', 0)):
+    STATICFILES_STORAGE = 'do_it_django_prj.storage.CompressedManifestStaticFilesStorage'
+
+# CDN 대신 `python manage.py vendor_static_assets`로 받아둔 jQuery, Popper, Bootstrap JS, Font Awesome을 사용.
+# 켜져 있어도 받아둔 파일이 없으면 CDN을 사용 (blog.context_processors.vendor_assets)
+BLOG_VENDOR_ASSETS = bool(int(os.environ.get('BLOG_VENDOR_ASSETS', 0)))
+# 받아둔 파일을 둘 폴더 (정적 파일 경로로는 blog/vendor/).
+# Docker 이미지는 빌드할 때 소스 폴더(볼륨으로 덮어씀) 밖의 /usr/src/vendor 에 받아둠 (Dockerfile)
+BLOG_VENDOR_DIR = os.environ.get('BLOG_VENDOR_DIR', os.path.join(BASE_DIR, 'blog', 'static', 'blog', 'vendor'))
+if os.path.normpath(BLOG_VENDOR_DIR) != os.path.join(BASE_DIR, 'blog', 'static', 'blog', 'vendor'):
+    STATICFILES_DIRS = [('blog/vendor', BLOG_VENDOR_DIR)]
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, '_media')
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
@@ -165,3 +244,64 @@ SITE_ID = 1
 ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_EMAIL_VERIFICATION = 'none'
 LOGIN_REDIRECT_URL = '/blog/'
+
+# 블로그 목록(전체, 카테고리, 태그, 검색) 한 페이지에 보여줄 포스트 수.
+# 0이면 페이지를 나누지 않고 모든 포스트를 BLOG_STREAM_CHUNK_SIZE개씩 읽으면서 스트리밍함 (blog/streaming.py)
+BLOG_POSTS_PER_PAGE = int(os.environ.get('BLOG_POSTS_PER_PAGE', 5))
+BLOG_STREAM_CHUNK_SIZE = int(os.environ.get('BLOG_STREAM_CHUNK_SIZE', 100))
+
+# 포스트 상세 페이지에 바로 보여줄 최신 댓글 수. 더 오래된 댓글은 버튼을 누르면 이만큼씩 더 불러옴.
+# 0이면 모든 댓글을 한 번에 보여줌.
+BLOG_COMMENTS_PER_PAGE = int(os.environ.get('BLOG_COMMENTS_PER_PAGE', 20))
+
+# 사이드바(카테고리별 포스트 수)를 캐시할 시간(초). 포스트/카테고리가 바뀌면 바로 지우지만,
+# 기본 캐시(LocMemCache)는 프로세스마다 따로라서 다른 워커의 캐시는 이 시간이 지나야 갱신됨.
+BLOG_SIDEBAR_CACHE_TIMEOUT = int(os.environ.get('BLOG_SIDEBAR_CACHE_TIMEOUT', 60))
+
+# 로그인하지 않은 사용자에게 보여주는 블로그 페이지를 캐시할 시간(초). 0이면 캐시하지 않음.
+BLOG_PAGE_CACHE_TIMEOUT = int(os.environ.get('BLOG_PAGE_CACHE_TIMEOUT', 60 * 10))
+
+# 읽기 전용 페이지(목록, 상세, 검색, 카테고리, 태그, landing)에 async 뷰를 사용할지 여부.
+# 기본값은 ASGI(do_it_django_prj/asgi.py)로 실행할 때만 사용. WSGI에서는 sync 뷰가 더 빠름.
+BLOG_ASYNC_VIEWS = bool(int(os.environ.get('BLOG_ASYNC_VIEWS', 1 if os.environ.get('DJANGO_ASGI') else 0)))
+
+# 요청 시간 통계(blog.middleware.RequestMetricsMiddleware)를 워커별 파일로 저장할 폴더.
+# 지정하면 REQUEST_METRICS_DUMP_EVERY 요청마다 저장하고 `python manage.py request_metrics`로 볼 수 있음.
+REQUEST_METRICS_DIR = os.environ.get('REQUEST_METRICS_DIR')
+REQUEST_METRICS_DUMP_EVERY = int(os.environ.get('REQUEST_METRICS_DUMP_EVERY', 100))
+# Server-Timing 헤더(DB, 템플릿, 마크다운 시간)는 스태프와 DEBUG일 때만 보냄. 1이면 모든 요청에 보냄.
+REQUEST_METRICS_SERVER_TIMING = bool(int(os.environ.get('REQUEST_METRICS_SERVER_TIMING', 0)))
+
+# 느린 쿼리/반복 쿼리 기록(blog.middleware.QueryLogMiddleware). BLOG_QUERY_LOG=1 일 때만 켜짐.
+# 'blog.queries' 로거가 BLOG_QUERY_LOG_FILE에 JSON Lines로 남기고, 파일이 커지면 돌려가며 새 파일을 씀.
+BLOG_QUERY_LOG = int(os.environ.get('BLOG_QUERY_LOG', 0))
+BLOG_SLOW_QUERY_MS = float(os.environ.get('BLOG_SLOW_QUERY_MS', 100))
+BLOG_DUPLICATE_QUERY_THRESHOLD = int(os.environ.get('BLOG_DUPLICATE_QUERY_THRESHOLD', 3))
+BLOG_QUERY_LOG_FILE = os.environ.get('BLOG_QUERY_LOG_FILE', os.path.join(BASE_DIR, '_logs', 'queries.log'))
+
+if BLOG_QUERY_LOG:
+    os.makedirs(os.path.dirname(BLOG_QUERY_LOG_FILE), exist_ok=True)
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'json': {'()': 'blog.querylog.JsonFormatter'},
+        },
+        'handlers': {
+            'query_file': {
+                'class': 'logging.handlers.RotatingFileHandler',
+                'filename': BLOG_QUERY_LOG_FILE,
+                'maxBytes': 10 * 1024 * 1024,
+                'backupCount': 5,
+                'formatter': 'json',
+                'encoding': 'utf-8',
+            },
+        },
+        'loggers': {
+            'blog.queries': {
+                'handlers': ['query_file'],
+                'level': 'WARNING',
+                'propagate': False,
+            },
+        },
+    }
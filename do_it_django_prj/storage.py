@@ -0,0 +1,43 @@
+import gzip
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 압축해서 이득이 있는 파일 (이미지, woff/woff2 글꼴은 이미 압축되어 있음)
+COMPRESS_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico', '.ttf', '.eot')
+MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # collectstatic 때 파일 이름에 내용의 해시를 붙이고(bootstrap.min.css -> bootstrap.min.5f3c1a2b9e0d.css),
+    # 압축할 만한 파일은 .gz(nginx gzip_static)와 .br(brotli 패키지가 있을 때)도 미리 만들어 둠.
+    # 해시가 붙은 파일은 내용이 바뀌면 이름도 바뀌므로 nginx에서 immutable로 오래 캐시함 (nginx/nginx.conf).
+
+    # 템플릿이 없는 파일을 가리켜도(about_me.html의 dog.jpg) 500 오류 대신 원래 이름으로 링크함
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super(CompressedManifestStaticFilesStorage, self).post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESS_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < MIN_SIZE:
+            return
+        compressed = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['.br'] = brotli.compress(content, quality=11)
+        for extension, data in compressed.items():
+            # 거의 줄어들지 않으면 압축하지 않은 파일을 그대로 보내는 편이 나음
+            if len(data) < len(content) * 0.95:
+                with open(self.path(name + extension), 'wb') as f:
+                    f.write(data)
@@ -0,0 +1,59 @@
+# gunicorn 설정. docker-compose에서 `gunicorn -c gunicorn.conf.py`로 실행.
+# 모든 값은 환경 변수로 바꿀 수 있음.
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# sync: 워커 하나가 요청 하나씩 처리
+# gthread: 워커마다 스레드 여러 개. DB를 기다리는 동안 다른 요청을 처리할 수 있음 (기본)
+# uvicorn: do_it_django_prj/asgi.py로 실행 (uvicorn 패키지 필요)
+worker_type = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_type == 'uvicorn':
+    wsgi_app = 'do_it_django_prj.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    default_workers = cpu_count + 1
+    default_threads = 1
+elif worker_type == 'gthread':
+    wsgi_app = 'do_it_django_prj.wsgi:application'
+    worker_class = 'gthread'
+    default_workers = cpu_count + 1
+    default_threads = 4
+else:
+    wsgi_app = 'do_it_django_prj.wsgi:application'
+    worker_class = 'sync'
+    default_workers = cpu_count * 2 + 1
+    default_threads = 1
+
+# WEB_CONCURRENCY는 여러 호스팅 서비스에서 쓰는 이름이라 그대로 따름
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', default_threads))
+
+# 워커를 fork하기 전에 Django를 한 번만 불러와서 워커끼리 메모리를 공유(copy-on-write)하고 시작 시간을 줄임.
+# 대신 코드를 바꾸면 워커만 다시 띄우는 HUP으로는 반영되지 않으므로 서버를 다시 시작해야 함.
+preload_app = bool(int(os.environ.get('GUNICORN_PRELOAD', 1)))
+
+# 메모리가 조금씩 늘어나는 것을 막기 위해 요청을 일정 수 처리한 워커는 새로 띄움.
+# jitter로 워커들이 한꺼번에 재시작하지 않도록 함.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# nginx 뒤에서 연결을 잠깐 유지해서 요청마다 TCP 연결을 새로 맺지 않게 함
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# 도커에서는 /tmp가 디스크일 수 있어서 워커 heartbeat 파일을 메모리(/dev/shm)에 둠
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+
+
+def post_fork(server, worker):
+    # preload_app일 때 마스터 프로세스에서 열린 DB 연결을 워커들이 같이 쓰지 않도록 닫음
+    from django.db import connections
+    connections.close_all()
@@ -0,0 +1,20 @@
+from django.shortcuts import render
+from blog.caching import cache_anonymous_page
+from do_it_django_prj.db_router import replica_reads
+from blog.concurrency import run_sync
+from .views import get_recent_posts
+
+# ASGI로 실행할 때 사용하는 landing 페이지의 async 버전 (blog/async_views.py 참고)
+
+
+@replica_reads
+@cache_anonymous_page()
+async def landing(request):
+    recent_posts = await run_sync(get_recent_posts)()
+    return await run_sync(render)(
+        request,
+        'single_pages/landing.html',
+        {
+        'recent_posts': recent_posts,
+        }
+    )
@@ -1,10 +1,14 @@
 from django.test import TestCase, Client
+from django.core.cache import cache
 from bs4 import BeautifulSoup
 from django.contrib.auth.models import User
-from blog.models import Post
+from blog.models import Post, Comment
+from blog.testing import QueryCountTestMixin
 
 class TestView(TestCase):
     def setUp(self):
+        # 캐시 무효화는 커밋된 뒤에 실행되는데(blog/signals.py) TestCase는 커밋하지 않으므로 테스트마다 캐시를 비움
+        cache.clear()
         self.client = Client()
         self.user_trump = User.objects.create_user(
             username='trump', password='somepassword'
@@ -46,6 +50,23 @@ class TestView(TestCase):
         self.assertIn(post_004.title, body.text)
 
 
+class TestQueryCount(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        # 캐시 무효화는 커밋된 뒤에 실행되는데(blog/signals.py) TestCase는 커밋하지 않으므로 테스트마다 캐시를 비움
+        cache.clear()
+        self.client = Client()
+        self.create_posts(5)
 
+    def create_posts(self, count):
+        # 작성자가 모두 다른 포스트
+        for i in range(count):
+            n = Post.objects.count()
+            author = User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com')
+            post = Post.objects.create(title=f'포스트 {n}', content='포스트입니다.', author=author)
+            Comment.objects.create(post=post, author=author, content='댓글입니다.')
 
-
+    def test_single_pages(self):
+        self.assertQueryCountFlat({
+            'landing': lambda client: client.get('/'),
+            'about_me': lambda client: client.get('/about_me/'),
+        }, lambda: self.create_posts(45))
@@ -1,8 +1,18 @@
 from django.shortcuts import render
 from blog.models import Post
+from blog.avatars import prime_avatar_urls
+from blog.caching import cache_anonymous_page
+from do_it_django_prj.db_router import replica_reads
 
+def get_recent_posts():
+    recent_posts = list(Post.objects.select_related('author').order_by('-pk')[:3])
+    prime_avatar_urls(post.author for post in recent_posts)
+    return recent_posts
+
+@replica_reads
+@cache_anonymous_page()
 def landing(request):
-    recent_posts = Post.objects.order_by('-pk')[:3]
+    recent_posts = get_recent_posts()
     return render(
         request,
         'single_pages/landing.html',